@@ -1,5 +1,6 @@
 from flask import Flask
 from config import Config
+from db_setup import initialize_database
 
 
 def create_app():
@@ -13,4 +14,7 @@ def create_app():
     from .routes import main
     app.register_blueprint(main)
 
+    from .warmup import apply_startup_imports
+    apply_startup_imports()
+
     return app
\ No newline at end of file
@@ -0,0 +1,115 @@
+import copy
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+from google.cloud import firestore
+from config import Config
+from app.gcp_clients import get_firestore_client
+
+# Document whose `version` is bumped on every article write; processes watching it with
+# on_snapshot drop their cached reads when another process changes an article.
+INVALIDATION_COLLECTION = "cache_state"
+INVALIDATION_DOCUMENT = "articles"
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl_seconds` after being stored."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Returns (True, value) for a live entry, else (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+article_cache = TTLCache(Config.ARTICLE_CACHE_MAX_ENTRIES, Config.ARTICLE_CACHE_TTL)
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def _ensure_invalidation_listener() -> None:
+    """Starts the on_snapshot listener once per process when ARTICLE_CACHE_WATCH is enabled."""
+    global _listener
+    if not Config.ARTICLE_CACHE_WATCH or _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is not None:
+            return
+        doc_ref = get_firestore_client().collection(INVALIDATION_COLLECTION).document(INVALIDATION_DOCUMENT)
+        try:
+            _listener = doc_ref.on_snapshot(lambda snapshots, changes, read_time: article_cache.clear())
+            logging.info("Watching article cache invalidations.")
+        except Exception as e:
+            # Leave _listener unset so the next read tries again; TTL expiry still applies.
+            logging.error(f"Could not start the article cache listener: {e}")
+
+def cached_read(namespace: str) -> Callable:
+    """Caches a Firestore read by its arguments.
+
+    Empty results (None or []) are not cached: a lookup that found nothing (such as the
+    duplicate check before processing) or swallowed an error always asks Firestore again.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Config.ARTICLE_CACHE_ENABLED:
+                return func(*args, **kwargs)
+            _ensure_invalidation_listener()
+            key = (namespace, args, tuple(sorted(kwargs.items())))
+            hit, value = article_cache.get(key)
+            if not hit:
+                value = func(*args, **kwargs)
+                if not value:
+                    return value
+                article_cache.set(key, value)
+            # Callers get their own copy so they can't modify the cached value.
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
+
+def invalidate_articles() -> None:
+    """Drops every cached article read here, and in other processes when ARTICLE_CACHE_WATCH is on.
+
+    Articles rarely change, so clearing everything is simpler than tracking which
+    URL, filename and recent-list entries mention the changed article.
+    """
+    article_cache.clear()
+    if not Config.ARTICLE_CACHE_WATCH:
+        return
+    try:
+        get_firestore_client().collection(INVALIDATION_COLLECTION).document(INVALIDATION_DOCUMENT).set(
+            {"version": firestore.Increment(1), "updated_at": firestore.SERVER_TIMESTAMP}, merge=True
+        )
+    except Exception as e:
+        logging.error(f"Could not publish article cache invalidation: {e}")
@@ -0,0 +1,321 @@
+import datetime
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+from config import Config
+from db_setup import initialize_database
+from app.firestore_database_operations import (
+    ARTICLE_LIST_FIELDS,
+    SORTABLE_FIELDS,
+    TOMBSTONES_COLLECTION,
+    decode_page_token,
+    encode_page_token,
+)
+from app.gcp_clients import get_firestore_client
+
+# Fields mirrored from Firestore; text_content stays in Firestore (the system of record).
+REPLICA_FIELDS = ARTICLE_LIST_FIELDS + ("normalized_url", "updated_at")
+_COLUMNS = (
+    "id", "title", "source", "url", "normalized_url", "publish_date", "processed_date",
+    "download_link", "authors", "hashtags", "voice_name", "audio_length", "updated_at",
+)
+
+def _timestamp(value) -> Optional[float]:
+    """Converts a Firestore timestamp (or missing value) to epoch seconds."""
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return value
+
+class ArticleReplica:
+    """Local SQLite copy of the Firestore articles collection, used for list, sort and hashtag reads.
+
+    Firestore stays the system of record. `sync` copies documents changed since the last
+    sync (by their `updated_at` field) and removes those tombstoned since then (by
+    `deleted_at`); `sync(full=True)` re-reads the whole collection, picks up documents
+    written before `updated_at` existed, removes every deleted one and prunes old tombstones.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        initialize_database(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _get_state(self, conn: sqlite3.Connection, name: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, conn: sqlite3.Connection, name: str, value) -> None:
+        conn.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def is_ready(self) -> bool:
+        """True once a full sync has completed, so reads can be served from the replica."""
+        conn = self._connect()
+        try:
+            return self._get_state(conn, "last_full_sync") is not None
+        finally:
+            conn.close()
+
+    def seconds_since_full_sync(self) -> float:
+        conn = self._connect()
+        try:
+            last_full_sync = self._get_state(conn, "last_full_sync")
+        finally:
+            conn.close()
+        return time.time() - float(last_full_sync) if last_full_sync else float("inf")
+
+    def _upsert(self, conn: sqlite3.Connection, article_id: str, data: dict) -> None:
+        hashtags = data.get("hashtags") or []
+        row = {
+            **{column: data.get(column) for column in _COLUMNS},
+            "id": article_id,
+            "authors": data.get("authors", "Unknown"),
+            "hashtags": json.dumps(hashtags),
+            "updated_at": _timestamp(data.get("updated_at")),
+        }
+        conn.execute(
+            f"INSERT OR REPLACE INTO articles ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})",
+            [row[column] for column in _COLUMNS],
+        )
+        conn.execute("DELETE FROM article_hashtags WHERE article_id = ?", (article_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO article_hashtags (hashtag, article_id) VALUES (?, ?)",
+            [(hashtag, article_id) for hashtag in hashtags],
+        )
+
+    def upsert(self, article_id: str, data: dict) -> None:
+        """Writes one article to the replica (used to apply the app's own writes immediately)."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            self._upsert(conn, article_id, data)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def delete(self, article_ids: Iterable[str]) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            for article_id in article_ids:
+                conn.execute("DELETE FROM article_hashtags WHERE article_id = ?", (article_id,))
+                conn.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def sync(self, full: bool = False, batch_size: int = 500) -> int:
+        """Copies changed Firestore articles into the replica; returns how many were written."""
+        conn = self._connect()
+        try:
+            high_water = self._get_state(conn, "updated_at_high_water")
+            full = full or self._get_state(conn, "last_full_sync") is None
+            query = get_firestore_client().collection("articles").select(list(REPLICA_FIELDS))
+            if not full and high_water:
+                # >= rather than >: documents sharing the high-water timestamp are re-applied, not skipped.
+                since = datetime.datetime.fromtimestamp(float(high_water), tz=datetime.timezone.utc)
+                query = query.where("updated_at", ">=", since).order_by("updated_at")
+
+            written, seen_ids, pending = 0, set(), []
+            max_updated_at = float(high_water) if high_water else 0.0
+            for doc in query.stream():
+                data = doc.to_dict()
+                pending.append((doc.id, data))
+                seen_ids.add(doc.id)
+                max_updated_at = max(max_updated_at, _timestamp(data.get("updated_at")) or 0.0)
+                if len(pending) >= batch_size:
+                    written += self._apply(conn, pending)
+                    pending = []
+            written += self._apply(conn, pending)
+            deleted_ids, max_deleted_at = self._fetch_tombstones(self._get_state(conn, "deleted_at_high_water"))
+
+            conn.execute("BEGIN")
+            if full:
+                local_ids = {row["id"] for row in conn.execute("SELECT id FROM articles")}
+                deleted_ids |= local_ids - seen_ids
+                self._set_state(conn, "last_full_sync", time.time())
+            for article_id in deleted_ids:
+                conn.execute("DELETE FROM article_hashtags WHERE article_id = ?", (article_id,))
+                conn.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+            if max_updated_at:
+                self._set_state(conn, "updated_at_high_water", max_updated_at)
+            if max_deleted_at:
+                self._set_state(conn, "deleted_at_high_water", max_deleted_at)
+            self._set_state(conn, "last_sync", time.time())
+            conn.execute("COMMIT")
+            logging.info(f"{'Full' if full else 'Incremental'} replica sync wrote {written} articles.")
+            if full:
+                try:
+                    self._prune_tombstones(time.time() - Config.REPLICA_TOMBSTONE_RETENTION)
+                except Exception as e:
+                    logging.error(f"Could not prune article tombstones: {e}")
+            return written
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _fetch_tombstones(high_water: Optional[str]) -> Tuple[Set[str], float]:
+        """Returns the ids of articles deleted since `high_water` and the latest deletion time seen."""
+        query = get_firestore_client().collection(TOMBSTONES_COLLECTION)
+        if high_water:
+            since = datetime.datetime.fromtimestamp(float(high_water), tz=datetime.timezone.utc)
+            query = query.where("deleted_at", ">=", since)
+        deleted_ids, max_deleted_at = set(), float(high_water) if high_water else 0.0
+        for doc in query.stream():
+            deleted_ids.add(doc.id)
+            max_deleted_at = max(max_deleted_at, _timestamp(doc.to_dict().get("deleted_at")) or 0.0)
+        return deleted_ids, max_deleted_at
+
+    @staticmethod
+    def _prune_tombstones(before: float, batch_size: int = 500) -> None:
+        """Deletes tombstones older than `before`; a replica that far behind catches up with a full sync."""
+        client = get_firestore_client()
+        cutoff = datetime.datetime.fromtimestamp(before, tz=datetime.timezone.utc)
+        query = client.collection(TOMBSTONES_COLLECTION).where("deleted_at", "<", cutoff)
+        batch, pending, pruned = client.batch(), 0, 0
+        for doc in query.stream():
+            batch.delete(doc.reference)
+            pending += 1
+            if pending >= batch_size:
+                batch.commit()
+                pruned += pending
+                batch, pending = client.batch(), 0
+        if pending:
+            batch.commit()
+            pruned += pending
+        if pruned:
+            logging.info(f"Pruned {pruned} article tombstones.")
+
+    def _apply(self, conn: sqlite3.Connection, documents: list) -> int:
+        if not documents:
+            return 0
+        conn.execute("BEGIN")
+        try:
+            for article_id, data in documents:
+                self._upsert(conn, article_id, data)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(documents)
+
+    @staticmethod
+    def _row_to_article(row: sqlite3.Row) -> dict:
+        article = {key: row[key] for key in row.keys() if key not in ("normalized_url", "updated_at")}
+        article["hashtags"] = json.loads(article["hashtags"] or "[]")
+        return article
+
+    def get_articles_page(self, sort_by: str = "processed_date", order: str = "desc", page_size: int = 10,
+                          page_token: str = None, hashtag: str = None) -> dict:
+        """Keyset-paginated listing with the same arguments, tokens and result as the Firestore version."""
+        if sort_by not in SORTABLE_FIELDS:
+            raise ValueError(f"Unsupported sort field: {sort_by}")
+        cursor = decode_page_token(page_token) if page_token else None
+        if cursor and (cursor.get("sort_by"), cursor.get("order"), cursor.get("hashtag")) != (sort_by, order, hashtag):
+            cursor = None
+        backwards = bool(cursor) and cursor.get("direction") == "prev"
+        descending = (order == "desc") != backwards
+
+        sort_column = f"COALESCE(a.{sort_by}, '')"
+        sql = "SELECT a.* FROM articles a"
+        params: List = []
+        conditions = []
+        if hashtag:
+            sql += " JOIN article_hashtags h ON h.article_id = a.id"
+            conditions.append("h.hashtag = ?")
+            params.append(hashtag)
+        if cursor:
+            value, last_id = cursor["values"]
+            comparison = "<" if descending else ">"
+            conditions.append(f"({sort_column} {comparison} ? OR ({sort_column} = ? AND a.id {comparison} ?))")
+            params += [value or "", value or "", last_id]
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY {sort_column} {direction}, a.id {direction} LIMIT ?"
+        params.append(page_size + 1)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        has_more = len(rows) > page_size
+        articles = [self._row_to_article(row) for row in rows[:page_size]]
+        if backwards:
+            articles.reverse()
+
+        def token_for(article: dict, page_direction: str) -> str:
+            return encode_page_token({
+                "sort_by": sort_by,
+                "order": order,
+                "hashtag": hashtag,
+                "direction": page_direction,
+                "values": [article.get(sort_by), article["id"]],
+            })
+
+        has_next = has_more if not backwards else True
+        has_prev = has_more if backwards else bool(cursor)
+        return {
+            "articles": articles,
+            "next_page_token": token_for(articles[-1], "next") if articles and has_next else None,
+            "prev_page_token": token_for(articles[0], "prev") if articles and has_prev else None,
+        }
+
+    def get_recent_articles(self, limit: int = 5) -> list:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT * FROM articles ORDER BY processed_date DESC, id DESC LIMIT ?", (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [self._row_to_article(row) for row in rows]
+
+_replica = None
+_replica_lock = threading.Lock()
+
+def get_article_replica() -> ArticleReplica:
+    """Returns the process-wide replica stored in SQLITE_DB_PATH."""
+    global _replica
+    with _replica_lock:
+        if _replica is None:
+            _replica = ArticleReplica(Config.SQLITE_DB_PATH)
+        return _replica
+
+def replica_reads_enabled() -> bool:
+    """True when ARTICLE_READ_SOURCE is "replica" and the replica has completed a full sync."""
+    if Config.ARTICLE_READ_SOURCE != "replica":
+        return False
+    try:
+        return get_article_replica().is_ready()
+    except sqlite3.Error as e:
+        logging.error(f"Article replica unavailable, reading from Firestore: {e}")
+        return False
+
+def apply_local_write(article_id: str, data: Optional[dict] = None) -> None:
+    """Mirrors a write made by this app into the replica right away (data=None deletes the article).
+
+    The periodic sync would pick the change up anyway; this keeps the app's own writes
+    visible immediately. Failures are logged and left for the next sync.
+    """
+    if Config.ARTICLE_READ_SOURCE != "replica":
+        return
+    try:
+        if data is None:
+            get_article_replica().delete([article_id])
+        else:
+            get_article_replica().upsert(article_id, {**data, "updated_at": time.time()})
+    except Exception as e:
+        logging.error(f"Could not apply write for article {article_id} to the replica: {e}")
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import httpx
+from config import Config
+from app.http_client import HEADERS, decode_html
+from app.text_extraction import RETRYABLE_STATUSES, extract_from_html
+
+# Longest Retry-After honoured; anything longer is treated as this many seconds.
+_MAX_RETRY_AFTER = 60.0
+_DONE = object()
+
+# Parsing pool shared by every batch of this process. Workers are spawned (the parent may hold
+# gRPC channels and threads that must not be forked), and a spawned worker re-imports the main
+# module, so workers are started once per process and reused instead of once per batch.
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_pid = None
+_parse_pool_lock = threading.Lock()
+
+class FetchError(Exception):
+    """A page could not be fetched: disallowed by robots.txt, an HTTP error or a network failure."""
+    pass
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Returns this process's parsing pool, starting it on first use (and again in a forked child)."""
+    global _parse_pool, _parse_pool_pid
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_pid != os.getpid():
+            _parse_pool = ProcessPoolExecutor(max_workers=Config.BULK_PARSE_PROCESSES or None,
+                                              mp_context=multiprocessing.get_context("spawn"))
+            _parse_pool_pid = os.getpid()
+        return _parse_pool
+
+def _discard_parse_pool(pool: ProcessPoolExecutor) -> None:
+    """Drops a pool that lost a worker, so the next parse starts a new one."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is pool:
+            _parse_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), _MAX_RETRY_AFTER)
+
+class AsyncFetcher:
+    """Fetches pages on one httpx.AsyncClient with a global concurrency cap, per-host
+    concurrency and spacing (stretched by robots.txt Crawl-delay and Retry-After), robots.txt
+    checks and retries of transient failures."""
+
+    def __init__(self, client: httpx.AsyncClient, max_concurrency: int = 32, max_per_host: int = 2,
+                 min_interval: float = 1.0, retries: int = 3, backoff_factor: int = 2, respect_robots: bool = True):
+        self.client = client
+        self.max_per_host = max(1, max_per_host)
+        self.min_interval = min_interval
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.respect_robots = respect_robots
+        self._global = asyncio.Semaphore(max(1, max_concurrency))
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._robots: Dict[str, "asyncio.Future[Optional[RobotFileParser]]"] = {}
+
+    async def _load_robots(self, origin: str) -> Optional[RobotFileParser]:
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            async with self._global:
+                response = await self.client.get(parser.url)
+        except httpx.HTTPError as e:
+            logging.warning(f"Could not fetch {parser.url}, assuming everything is allowed: {e}")
+            return None
+        # Same interpretation as RobotFileParser.read(): 401/403 forbid everything, other errors allow everything.
+        if response.status_code in (401, 403):
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        parser.modified()
+        return parser
+
+    async def _robots_for(self, url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        if origin not in self._robots:
+            self._robots[origin] = asyncio.ensure_future(self._load_robots(origin))
+        return await self._robots[origin]
+
+    async def _wait_turn(self, host: str, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start_at = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start_at + interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    async def fetch(self, url: str) -> str:
+        """Returns the page's HTML; raises FetchError once it is disallowed or out of attempts."""
+        interval = self.min_interval
+        if self.respect_robots:
+            robots = await self._robots_for(url)
+            if robots:
+                if not robots.can_fetch(HEADERS["User-Agent"], url):
+                    raise FetchError(f"Disallowed by robots.txt: {url}")
+                interval = max(interval, robots.crawl_delay(HEADERS["User-Agent"]) or 0)
+
+        host = urlparse(url).netloc.lower()
+        host_slot = self._host_slots.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries):
+            retry_after = None
+            async with host_slot:
+                await self._wait_turn(host, interval)
+                try:
+                    async with self._global:
+                        response = await self.client.get(url)
+                except httpx.TransportError as e:
+                    error = FetchError(f"{type(e).__name__} fetching {url}: {e}")
+                else:
+                    if response.status_code < 400:
+                        return decode_html(response)
+                    error = FetchError(f"HTTP {response.status_code} for {url}")
+                    if response.status_code not in RETRYABLE_STATUSES:
+                        raise error
+                    retry_after = _retry_after_seconds(response)
+            if attempt == self.retries - 1:
+                raise error
+            # Back off the whole host, not just this URL: the next request to it waits too.
+            delay = retry_after if retry_after is not None else self.backoff_factor ** attempt
+            self._next_start[host] = max(self._next_start.get(host, 0.0), loop.time() + delay)
+            logging.warning(f"{error}; retrying in {delay:.1f}s (attempt {attempt + 1}/{self.retries}).")
+        raise FetchError(f"Could not fetch {url}")
+
+async def _extract_all(urls: Iterable[str], precheck: Optional[Callable[[str], Optional[dict]]],
+                       results: "queue.Queue", stop: threading.Event) -> None:
+    loop = asyncio.get_running_loop()
+    concurrency = Config.BULK_FETCH_CONCURRENCY
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(Config.BULK_FETCH_TIMEOUT, pool=None)
+
+    async def extract_one(index: int, url: str) -> Tuple[int, dict]:
+        started = time.monotonic()
+        result = {"url": url, "timings": {}, "started": started}
+        try:
+            if precheck:
+                early_result = await loop.run_in_executor(None, precheck, url)
+                if early_result is not None:
+                    result.update(early_result)
+                    return index, result
+            html = await fetcher.fetch(url)
+            fetched = time.monotonic()
+            result["timings"]["fetch"] = round(fetched - started, 3)
+            parse_pool = get_parse_pool()
+            try:
+                article_data = await loop.run_in_executor(parse_pool, extract_from_html, url, html)
+            except BrokenProcessPool:
+                _discard_parse_pool(parse_pool)
+                raise
+            result["timings"]["parse"] = round(time.monotonic() - fetched, 3)
+            if not article_data.get("text"):
+                raise ValueError("No text content found at the provided URL.")
+            result.update(status="Extracted", article_data=article_data)
+        except Exception as e:
+            logging.error(f"Failed to extract {url}: {e}")
+            result.update(status="Failed", error=str(e))
+        result["timings"]["extract"] = round(time.monotonic() - started, 3)
+        return index, result
+
+    async with httpx.AsyncClient(headers=HEADERS, limits=limits, timeout=timeout, follow_redirects=True) as client:
+        fetcher = AsyncFetcher(client, concurrency, Config.BATCH_DOMAIN_CONCURRENCY, Config.BATCH_DOMAIN_INTERVAL,
+                               respect_robots=Config.BULK_RESPECT_ROBOTS)
+        # Keep a bounded window of URLs in flight so a long (or endless) input isn't turned into tasks all at once.
+        url_iter = enumerate(urls)
+        pending = set()
+        while not stop.is_set():
+            for index, url in url_iter:
+                pending.add(asyncio.ensure_future(extract_one(index, url)))
+                if len(pending) >= concurrency * 4:
+                    break
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                await loop.run_in_executor(None, results.put, task.result())
+        for task in pending:
+            task.cancel()
+
+def iter_extracted_articles(urls: Iterable[str],
+                            precheck: Optional[Callable[[str], Optional[dict]]] = None) -> Iterator[Tuple[int, dict]]:
+    """Fetches and extracts URLs concurrently, yielding (input index, result) as each finishes.
+
+    Fetching runs on an asyncio loop in a background thread and parsing on a process
+    pool. Results look like {"url", "status", "timings", "started", ...} with status
+    "Extracted" (plus "article_data") or "Failed" (plus "error"). `precheck(url)`, run
+    in a thread before fetching, may return a dict of fields to finish a URL early.
+    Closing the generator stops the remaining work.
+    """
+    results: "queue.Queue" = queue.Queue(maxsize=Config.BULK_FETCH_CONCURRENCY)
+    stop = threading.Event()
+    errors = []
+
+    def run() -> None:
+        try:
+            asyncio.run(_extract_all(urls, precheck, results, stop))
+        except Exception as e:
+            logging.error(f"Bulk extraction stopped: {e}", exc_info=True)
+            errors.append(e)
+        finally:
+            results.put(_DONE)
+
+    thread = threading.Thread(target=run, name="bulk-fetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        # Unblock the loop if it is waiting for room in the queue.
+        while thread.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+    if errors:
+        raise errors[0]
@@ -0,0 +1,274 @@
+import logging
+import shutil
+import struct
+import subprocess
+import threading
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+class AudioProcessingError(Exception):
+    """Raised when encoded audio cannot be parsed or post-processed."""
+    pass
+
+# Bitrates in kbps indexed by [version is MPEG-1][layer][bitrate index].
+_BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+# Sample rates indexed by the 2-bit version id (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1).
+_SAMPLE_RATES = {0: [11025, 12000, 8000], 2: [22050, 24000, 16000], 3: [44100, 48000, 32000]}
+
+class Mp3Frame(NamedTuple):
+    offset: int
+    length: int
+    sample_rate: int
+    samples: int
+    is_info_frame: bool
+
+def _id3v2_size(data: bytes) -> int:
+    """Returns the size of a leading ID3v2 tag, or 0 if there is none."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    has_footer = data[5] & 0x10
+    return 10 + size + (10 if has_footer else 0)
+
+def _parse_frame_header(data: bytes, offset: int) -> Optional[Tuple[int, int, int, int]]:
+    """Parses the frame header at `offset`; returns (length, sample_rate, samples, side_info_size)."""
+    if offset + 4 > len(data) or data[offset] != 0xFF or (data[offset + 1] & 0xE0) != 0xE0:
+        return None
+    version_id = (data[offset + 1] >> 3) & 0x03
+    layer_bits = (data[offset + 1] >> 1) & 0x03
+    bitrate_index = (data[offset + 2] >> 4) & 0x0F
+    sample_rate_index = (data[offset + 2] >> 2) & 0x03
+    padding = (data[offset + 2] >> 1) & 0x01
+    mono = ((data[offset + 3] >> 6) & 0x03) == 3
+    if version_id == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_id == 3
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_id][sample_rate_index]
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    if mpeg1:
+        side_info_size = 17 if mono else 32
+    else:
+        side_info_size = 9 if mono else 17
+    return length, sample_rate, samples, side_info_size
+
+def iter_mp3_frames(data: bytes) -> Iterator[Mp3Frame]:
+    """Yields the MPEG audio frames in `data`, skipping ID3v2/ID3v1 tags and resyncing over junk."""
+    offset = _id3v2_size(data)
+    end = len(data)
+    if end >= 128 and data[-128:-125] == b"TAG":
+        end -= 128
+    while offset + 4 <= end:
+        header = _parse_frame_header(data, offset)
+        if header is None or offset + header[0] > end:
+            offset += 1
+            continue
+        length, sample_rate, samples, side_info_size = header
+        tag_offset = offset + 4 + side_info_size
+        is_info_frame = (
+            data[tag_offset:tag_offset + 4] in (b"Xing", b"Info")
+            or data[offset + 36:offset + 40] == b"VBRI"
+        )
+        yield Mp3Frame(offset, length, sample_rate, samples, is_info_frame)
+        offset += length
+
+# Encoder strings that open a LAME tag: LAME itself, and FFmpeg's libmp3lame muxer (older
+# releases write "Lavc", newer ones "Lavf").
+_LAME_TAG_ENCODERS = (b"LAME", b"Lavc", b"Lavf")
+
+def _lame_gapless_samples(data: bytes, frame: Mp3Frame) -> int:
+    """Returns encoder delay + padding recorded in a LAME tag inside a Xing/Info frame, else 0."""
+    frame_bytes = data[frame.offset:frame.offset + frame.length]
+    tag_offset = max(frame_bytes.find(b"Xing"), frame_bytes.find(b"Info"))
+    if tag_offset < 0:
+        return 0
+    flags = struct.unpack(">I", frame_bytes[tag_offset + 4:tag_offset + 8])[0]
+    lame_offset = tag_offset + 8 + (4 if flags & 0x1 else 0) + (4 if flags & 0x2 else 0) + (100 if flags & 0x4 else 0) + (4 if flags & 0x8 else 0)
+    if frame_bytes[lame_offset:lame_offset + 4] not in _LAME_TAG_ENCODERS:
+        return 0
+    gapless = frame_bytes[lame_offset + 21:lame_offset + 24]
+    if len(gapless) < 3:
+        return 0
+    delay = (gapless[0] << 4) | (gapless[1] >> 4)
+    padding = ((gapless[1] & 0x0F) << 8) | gapless[2]
+    return delay + padding
+
+def mp3_duration(data: bytes) -> float:
+    """Computes the duration of an MP3 buffer from its frame headers, without decoding.
+
+    Encoder delay and padding from a LAME/Lavc/Lavf gapless tag are subtracted when present.
+    """
+    samples, sample_rate, trimmed = 0, 0, 0
+    for frame in iter_mp3_frames(data):
+        if frame.is_info_frame:
+            trimmed = _lame_gapless_samples(data, frame)
+            continue
+        samples += frame.samples
+        sample_rate = sample_rate or frame.sample_rate
+    if not sample_rate:
+        return 0.0
+    return max(samples - trimmed, 0) / sample_rate
+
+def wav_duration(data: bytes, sample_rate: int = 24000, channels: int = 1, sample_width: int = 2) -> float:
+    """Computes the duration of a LINEAR16/MULAW/ALAW response from its RIFF header.
+
+    Headerless PCM falls back to the given sample rate, channel count and sample width.
+    """
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return len(data) / (sample_rate * channels * sample_width)
+    offset, data_size = 12, None
+    while offset + 8 <= len(data):
+        chunk_id, chunk_size = data[offset:offset + 4], struct.unpack("<I", data[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            channels, sample_rate = struct.unpack("<HI", data[body + 2:body + 8])
+            sample_width = struct.unpack("<H", data[body + 14:body + 16])[0] // 8
+        elif chunk_id == b"data":
+            # Streamed WAVs may carry a placeholder size; trust the bytes actually present.
+            data_size = min(chunk_size, len(data) - body)
+            break
+        offset = body + chunk_size + (chunk_size & 1)
+    if data_size is None:
+        raise AudioProcessingError("WAV data chunk not found.")
+    return data_size / (sample_rate * channels * sample_width)
+
+def ogg_duration(data: bytes) -> float:
+    """Computes the duration of an Ogg Opus/Vorbis stream from its last page's granule position."""
+    if data[:4] != b"OggS":
+        raise AudioProcessingError("Not an Ogg stream.")
+    last_page = data.rfind(b"OggS")
+    granule_position = struct.unpack("<q", data[last_page + 6:last_page + 14])[0]
+    # The first packet starts right after the first page's segment table.
+    segments = data[26]
+    head = data[27 + segments:27 + segments + 19]
+    if head[:8] == b"OpusHead":
+        pre_skip = struct.unpack("<H", head[10:12])[0]
+        return max(granule_position - pre_skip, 0) / 48000
+    if head[1:7] == b"vorbis":
+        sample_rate = struct.unpack("<I", head[12:16])[0]
+        return max(granule_position, 0) / sample_rate
+    raise AudioProcessingError("Unsupported Ogg codec.")
+
+def audio_duration(data: bytes, encoding: str = "MP3") -> float:
+    """Returns the duration in seconds of encoded TTS audio given its AudioEncoding name."""
+    if encoding == "MP3":
+        return mp3_duration(data)
+    if encoding == "OGG_OPUS":
+        return ogg_duration(data)
+    if encoding == "LINEAR16":
+        return wav_duration(data)
+    if encoding in ("MULAW", "ALAW"):
+        return wav_duration(data, sample_width=1)
+    raise AudioProcessingError(f"Unsupported audio encoding: {encoding}")
+
+def write_mp3_frames(data: bytes, output: BinaryIO) -> float:
+    """Writes only the audio frames of an MP3 buffer to `output` and returns their duration in seconds.
+
+    Tags and Xing/Info/VBRI header frames are left out, since those describe a single
+    file and would be wrong (or audible as a glitch) in the middle of a concatenation.
+    """
+    spans, samples, sample_rate = [], 0, 0
+    for frame in iter_mp3_frames(data):
+        if frame.is_info_frame:
+            continue
+        samples += frame.samples
+        sample_rate = sample_rate or frame.sample_rate
+        frame_end = frame.offset + frame.length
+        if spans and spans[-1][1] == frame.offset:
+            spans[-1] = (spans[-1][0], frame_end)
+        else:
+            spans.append((frame.offset, frame_end))
+    if not spans and data:
+        raise AudioProcessingError("No MPEG audio frames found in chunk.")
+    view = memoryview(data)
+    for start, end in spans:
+        output.write(view[start:end])
+    return samples / sample_rate if sample_rate else 0.0
+
+class _LoudnessNormalizer:
+    """Single streaming ffmpeg `loudnorm` pass: MP3 frames in on stdin, normalized MP3 out on stdout."""
+
+    def __init__(self, output: BinaryIO, sample_rate: int, loudnorm_filter: str):
+        ffmpeg = shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise AudioProcessingError("ffmpeg is required for loudness normalization.")
+        self._process = subprocess.Popen(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", "mp3", "-i", "pipe:0",
+             "-af", loudnorm_filter, "-ar", str(sample_rate), "-f", "mp3", "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        self._output = output
+        self._stderr = b""
+        self._reader = threading.Thread(target=self._pump_stdout, daemon=True)
+        self._reader.start()
+
+    def _pump_stdout(self) -> None:
+        for block in iter(lambda: self._process.stdout.read(64 * 1024), b""):
+            self._output.write(block)
+
+    def write(self, data) -> None:
+        self._process.stdin.write(data)
+
+    def close(self) -> None:
+        self._process.stdin.close()
+        self._stderr = self._process.stderr.read()
+        self._reader.join()
+        if self._process.wait() != 0:
+            raise AudioProcessingError(f"ffmpeg loudness normalization failed: {self._stderr.decode(errors='replace')}")
+
+    def abort(self) -> None:
+        self._process.kill()
+        self._process.wait()
+        self._reader.join()
+
+def concatenate_mp3_chunks(
+    chunk_files: Iterable[str],
+    output: BinaryIO,
+    normalize: bool = False,
+    loudnorm_filter: str = "loudnorm=I=-16:TP=-1.5:LRA=11"
+) -> float:
+    """Streams the frames of each chunk file into `output` without decoding to PCM.
+
+    Only one chunk is held in memory at a time. With `normalize`, the frames are piped
+    through a single ffmpeg loudnorm pass instead of being written as-is. Returns the
+    total duration in seconds, counted from the frame headers.
+    """
+    normalizer = None
+    duration = 0.0
+    try:
+        for chunk_file in chunk_files:
+            with open(chunk_file, "rb") as f:
+                data = f.read()
+            if normalize and normalizer is None:
+                first_frame = next(iter_mp3_frames(data), None)
+                if first_frame is None:
+                    raise AudioProcessingError(f"No MPEG audio frames found in {chunk_file}.")
+                normalizer = _LoudnessNormalizer(output, first_frame.sample_rate, loudnorm_filter)
+            duration += write_mp3_frames(data, normalizer or output)
+        if normalizer:
+            normalizer.close()
+            normalizer = None
+        return duration
+    finally:
+        if normalizer:
+            normalizer.abort()
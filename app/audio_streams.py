@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+from config import Config
+
+class AudioStream:
+    """MP3 audio of one article render, kept so every GET can replay it from the start while it grows.
+
+    Once the render finishes, new readers are sent to `download_link` and the buffered audio
+    is released (readers already attached keep their own reference until they finish).
+    """
+
+    def __init__(self, stream_id: str, url: str):
+        self.id = stream_id
+        self.url = url
+        self.download_link: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self._chunks: List[bytes] = []
+        self._done = False
+        self._condition = threading.Condition()
+
+    def append(self, data: bytes) -> None:
+        with self._condition:
+            self._chunks.append(data)
+            self._condition.notify_all()
+
+    def finish(self, download_link: Optional[str] = None) -> None:
+        with self._condition:
+            self._done = True
+            self.download_link = download_link
+            self.finished_at = time.time()
+            if download_link:
+                self._chunks = []
+            self._condition.notify_all()
+
+    def iter_audio(self) -> Iterator[bytes]:
+        """Yields the audio from the beginning, waiting for more until the render finishes."""
+        with self._condition:
+            chunks = self._chunks
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(chunks) and not self._done:
+                    self._condition.wait()
+                pending = chunks[index:]
+                done = self._done
+            index += len(pending)
+            yield from pending
+            if done and index >= len(chunks):
+                return
+
+class AudioStreamRegistry:
+    """Streams of this process by id; finished streams are forgotten after `retention_seconds`."""
+
+    def __init__(self, retention_seconds: float = 300):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._streams: Dict[str, AudioStream] = {}
+
+    def create(self, url: str) -> AudioStream:
+        stream = AudioStream(uuid.uuid4().hex, url)
+        with self._lock:
+            self._prune()
+            self._streams[stream.id] = stream
+        return stream
+
+    def get(self, stream_id: str) -> Optional[AudioStream]:
+        with self._lock:
+            self._prune()
+            return self._streams.get(stream_id)
+
+    def _prune(self) -> None:
+        expired_before = time.time() - self.retention_seconds
+        for stream_id in [stream_id for stream_id, stream in self._streams.items()
+                          if stream.finished_at and stream.finished_at < expired_before]:
+            del self._streams[stream_id]
+
+_audio_streams = None
+_audio_streams_lock = threading.Lock()
+
+def get_audio_streams() -> AudioStreamRegistry:
+    """Returns the process-wide registry of streamed renders."""
+    global _audio_streams
+    with _audio_streams_lock:
+        if _audio_streams is None:
+            _audio_streams = AudioStreamRegistry(Config.STREAM_RETENTION_SECONDS)
+        return _audio_streams
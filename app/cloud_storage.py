@@ -1,32 +1,51 @@
 import os
+import base64
+import hashlib
 import logging
+import mimetypes
+import threading
 import traceback
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import google_crc32c
+from google.api_core.exceptions import GoogleAPICallError, PreconditionFailed, RetryError
 from google.cloud import storage
-from typing import Optional
+from google.cloud.storage.retry import DEFAULT_RETRY
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+from config import Config
+from app.gcp_clients import get_firestore_client, get_storage_client
+
+# GCS composes at most 32 source objects into one.
+_MAX_COMPOSE_SOURCES = 32
+_HASH_READ_SIZE = 1024 * 1024
 
 class UploadError(Exception):
     pass
 
-def upload_to_gcs(local_path: str, filename: str, retries: int = 3) -> Optional[str]:
-    """Uploads a file to Google Cloud Storage, with retry logic."""
+def _get_bucket() -> storage.Bucket:
     bucket_name = os.getenv("GCS_BUCKET_NAME")
     if not bucket_name:
         logging.error("GCS_BUCKET_NAME environment variable is not set.")
         raise EnvironmentError("GCS_BUCKET_NAME is required.")
-    
+    return get_storage_client().bucket(bucket_name)
+
+def _upload_with_retries(filename: str, upload: Callable[[storage.Blob], None], retries: int) -> str:
+    """Runs `upload` on the blob for `filename` with exponential backoff; returns its public URL."""
     try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(filename)
-        
+        blob = _get_bucket().blob(filename)
+
         logging.info(f"Uploading {filename} to Google Cloud Storage...")
         for attempt in range(retries):
             try:
-                blob.upload_from_filename(local_path)
+                upload(blob)
                 logging.info(f"File {filename} successfully uploaded.")
                 return blob.public_url
-            except (storage.exceptions.GoogleAPIError, storage.exceptions.RetryError) as e:
+            except PreconditionFailed:
+                # A create-only upload found the name taken; retrying can't succeed.
+                raise UploadError(f"{filename} already exists in Google Cloud Storage.")
+            except (GoogleAPICallError, RetryError) as e:
                 if attempt < retries - 1:
                     backoff_time = 2 ** attempt  # Exponential backoff
                     logging.warning(f"Retrying upload in {backoff_time} seconds... Attempt {attempt + 1}")
@@ -39,3 +58,193 @@ def upload_to_gcs(local_path: str, filename: str, retries: int = 3) -> Optional[
         logging.error(f"Unexpected error uploading file to GCS: {e}")
         logging.error(traceback.format_exc())
         raise
+
+def _file_digests(file_obj: BinaryIO) -> Tuple[str, str, int]:
+    """Returns (md5 hex, crc32c base64 as GCS reports it, size) of a seekable file object's whole contents."""
+    md5, crc32c, size = hashlib.md5(), google_crc32c.Checksum(), 0
+    file_obj.seek(0)
+    for block in iter(lambda: file_obj.read(_HASH_READ_SIZE), b""):
+        md5.update(block)
+        crc32c.update(block)
+        size += len(block)
+    file_obj.seek(0)
+    return md5.hexdigest(), base64.b64encode(crc32c.digest()).decode("ascii"), size
+
+def _hash_index_document(md5_hex: str):
+    return get_firestore_client().collection(Config.UPLOAD_HASH_COLLECTION).document(md5_hex)
+
+def find_duplicate_upload(md5_hex: str, crc32c: str, size: int) -> Optional[str]:
+    """Returns the URL of an existing object with this content, or None.
+
+    The hash index maps MD5 to object name; the object's CRC32C and size are checked too,
+    since composite objects have no MD5 of their own and the object may have been removed.
+    """
+    snapshot = _hash_index_document(md5_hex).get()
+    if not snapshot.exists:
+        return None
+    blob = _get_bucket().get_blob(snapshot.get("filename"))
+    if blob is None or blob.crc32c != crc32c or blob.size != size:
+        return None
+    return blob.public_url
+
+def _record_upload_hash(md5_hex: str, crc32c: str, size: int, filename: str) -> None:
+    try:
+        _hash_index_document(md5_hex).set({"filename": filename, "crc32c": crc32c, "size": size})
+    except Exception as e:
+        logging.warning(f"Could not record the content hash of {filename}: {e}")
+
+def _composite_upload(blob: storage.Blob, file_obj: BinaryIO, size: int, content_type: str,
+                      if_generation_match: Optional[int] = None) -> None:
+    """Uploads UPLOAD_COMPOSITE_PARTS slices of `file_obj` concurrently, then composes them into `blob`."""
+    part_count = max(2, min(Config.UPLOAD_COMPOSITE_PARTS, _MAX_COMPOSE_SOURCES))
+    part_size = -(-size // part_count)
+    prefix = f"{Config.UPLOAD_COMPOSITE_PREFIX}{blob.name}/{uuid.uuid4().hex}/"
+    parts = [blob.bucket.blob(f"{prefix}{index:02d}") for index in range(-(-size // part_size))]
+    read_lock = threading.Lock()
+
+    def upload_part(index: int) -> None:
+        with read_lock:
+            file_obj.seek(index * part_size)
+            data = file_obj.read(part_size)
+        # if_generation_match=0 makes the create idempotent, so transient errors are retried.
+        parts[index].upload_from_string(data, content_type=content_type, if_generation_match=0, checksum="crc32c")
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(parts), Config.UPLOAD_COMPOSITE_WORKERS),
+                                thread_name_prefix="gcs-part") as executor:
+            list(executor.map(upload_part, range(len(parts))))
+        blob.content_type = content_type
+        blob.compose(parts, if_generation_match=if_generation_match)
+        logging.info(f"Composed {blob.name} from {len(parts)} parts.")
+    finally:
+        blob.bucket.delete_blobs(parts, on_error=lambda part: None)
+
+def _upload_file(file_obj: BinaryIO, filename: str, retries: int, content_type: str,
+                 if_generation_match: Optional[int] = None) -> str:
+    md5_hex, crc32c, size = _file_digests(file_obj)
+    if Config.UPLOAD_DEDUP_ENABLED:
+        duplicate_url = find_duplicate_upload(md5_hex, crc32c, size)
+        if duplicate_url:
+            logging.info(f"Skipping upload of {filename}; identical content already stored at {duplicate_url}.")
+            return duplicate_url
+
+    if size >= Config.UPLOAD_COMPOSITE_THRESHOLD_MB * 1024 * 1024:
+        upload = lambda blob: _composite_upload(blob, file_obj, size, content_type, if_generation_match)
+    else:
+        upload = lambda blob: blob.upload_from_file(file_obj, rewind=True, content_type=content_type,
+                                                    if_generation_match=if_generation_match)
+    url = _upload_with_retries(filename, upload, retries)
+
+    if Config.UPLOAD_DEDUP_ENABLED:
+        _record_upload_hash(md5_hex, crc32c, size, filename)
+    return url
+
+def upload_to_gcs(local_path: str, filename: str, retries: int = 3) -> Optional[str]:
+    """Uploads a file to Google Cloud Storage, with retry logic."""
+    content_type = mimetypes.guess_type(local_path)[0] or "application/octet-stream"
+    with open(local_path, "rb") as file_obj:
+        return _upload_file(file_obj, filename, retries, content_type)
+
+def upload_file_object(file_obj: BinaryIO, filename: str, retries: int = 3, content_type: str = "audio/mpeg") -> str:
+    """Uploads the contents of a seekable file object (rewound before each attempt), with retry logic.
+
+    The object is only created, never overwritten: UploadError is raised if `filename` exists.
+    """
+    return _upload_file(file_obj, filename, retries, content_type, if_generation_match=0)
+
+class StreamingUpload:
+    """Writable side of gcs_upload_stream: forwards writes to the resumable upload and digests them.
+
+    `url` is set when the block exits successfully: the new object's public URL, or that of
+    an existing object with the same content when UPLOAD_DEDUP_ENABLED found one.
+    """
+
+    def __init__(self, writer):
+        self._writer = writer
+        self._md5 = hashlib.md5()
+        self._crc32c = google_crc32c.Checksum()
+        self.size = 0
+        self.url: Optional[str] = None
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._md5.update(data)
+        self._crc32c.update(data)
+        self.size += len(data)
+        return self._writer.write(data)
+
+    def digests(self) -> Tuple[str, str, int]:
+        """Returns (md5 hex, crc32c base64, size) of everything written so far, as _file_digests does."""
+        return self._md5.hexdigest(), base64.b64encode(self._crc32c.digest()).decode("ascii"), self.size
+
+@contextmanager
+def gcs_upload_stream(filename: str, content_type: str = "audio/mpeg") -> Iterator[StreamingUpload]:
+    """Yields a writable StreamingUpload backed by a resumable upload to `filename`.
+
+    Data is sent in UPLOAD_CHUNK_SIZE_MB chunks as it is written (each chunk is retried
+    on transient errors) and the object is finalized when the block exits. If the block
+    raises, the session is abandoned without finalizing, so no partial object is created.
+    Finalizing fails instead of overwriting if `filename` already exists.
+
+    With UPLOAD_DEDUP_ENABLED, the content is hashed as it is written and looked up in the
+    hash index before finalizing; a duplicate's session is abandoned and its URL reused.
+    """
+    blob = _get_bucket().blob(filename)
+    writer = blob.open(
+        "wb",
+        content_type=content_type,
+        chunk_size=Config.UPLOAD_CHUNK_SIZE_MB * 1024 * 1024,
+        ignore_flush=True,
+        retry=DEFAULT_RETRY,
+        if_generation_match=0,
+    )
+    upload = StreamingUpload(writer)
+    logging.info(f"Streaming {filename} to Google Cloud Storage...")
+    try:
+        yield upload
+    except BaseException as e:
+        logging.error(f"Streaming upload of {filename} failed; abandoning it: {e}")
+        _abandon_upload(writer)
+        raise
+
+    md5_hex, crc32c, size = upload.digests()
+    if Config.UPLOAD_DEDUP_ENABLED:
+        try:
+            duplicate_url = find_duplicate_upload(md5_hex, crc32c, size)
+        except Exception as e:
+            logging.warning(f"Could not check for a duplicate of {filename}; uploading it: {e}")
+            duplicate_url = None
+        if duplicate_url:
+            logging.info(f"Not finalizing {filename}; identical content already stored at {duplicate_url}.")
+            _abandon_upload(writer)
+            upload.url = duplicate_url
+            return
+
+    writer.close()
+    upload.url = blob.public_url
+    logging.info(f"File {filename} successfully uploaded.")
+    if Config.UPLOAD_DEDUP_ENABLED:
+        _record_upload_hash(md5_hex, crc32c, size, filename)
+
+def _abandon_upload(writer) -> None:
+    """Drops a BlobWriter without finalizing: its buffered data is discarded and any resumable session cancelled.
+
+    BlobWriter has no public way to do this; closing it would upload the buffer and create the object.
+    """
+    upload_and_transport = writer._upload_and_transport
+    writer._buffer.close()
+    if upload_and_transport:
+        upload, transport = upload_and_transport
+        try:
+            # GCS answers 499 to a cancelled session; unfinished sessions would expire after a week anyway.
+            transport.delete(upload.resumable_url)
+        except Exception as e:
+            logging.warning(f"Could not cancel the resumable upload session for {writer._blob.name}: {e}")
+
+def unique_blob_name(filename: str) -> str:
+    """Returns `filename` with a random suffix, so concurrent renders of the same title never share a name.
+
+    Uploads to these names are create-only, so even a collision can't overwrite an object.
+    """
+    base_name, extension = os.path.splitext(filename)
+    return f"{base_name}_{uuid.uuid4().hex[:8]}{extension}"
@@ -0,0 +1,117 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+from config import Config
+from db_setup import initialize_database
+from app.file_management import normalize_url
+
+class ExtractionCache:
+    """SQLite-backed cache of extract_text_from_url results, keyed by normalized URL.
+
+    Entries expire `ttl_seconds` after extraction; beyond `max_entries`, the least
+    recently used are evicted. Shared by every process using the same database file.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 3600, max_entries: int = 500):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        initialize_database(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, url: str) -> Optional[dict]:
+        key = normalize_url(url)
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT article_data, created_at FROM extraction_cache WHERE normalized_url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row["created_at"] + self.ttl_seconds < now:
+                conn.execute("DELETE FROM extraction_cache WHERE normalized_url = ?", (key,))
+                return None
+            conn.execute("UPDATE extraction_cache SET last_used_at = ? WHERE normalized_url = ?", (now, key))
+            return json.loads(row["article_data"])
+        finally:
+            conn.close()
+
+    def set(self, url: str, article_data: dict) -> None:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """INSERT OR REPLACE INTO extraction_cache (normalized_url, article_data, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?)""",
+                (normalize_url(url), json.dumps(article_data), now, now),
+            )
+            conn.execute("DELETE FROM extraction_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """DELETE FROM extraction_cache WHERE normalized_url IN (
+                       SELECT normalized_url FROM extraction_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def delete(self, url: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM extraction_cache WHERE normalized_url = ?", (normalize_url(url),))
+        finally:
+            conn.close()
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+def get_extraction_cache() -> ExtractionCache:
+    """Returns the process-wide extraction cache stored in SQLITE_DB_PATH."""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache(
+                Config.SQLITE_DB_PATH, Config.EXTRACTION_CACHE_TTL, Config.EXTRACTION_CACHE_MAX_ENTRIES
+            )
+        return _extraction_cache
+
+def extract_article(url: str) -> dict:
+    """Returns extract_text_from_url(url), reusing a recent extraction of the same normalized URL.
+
+    Only extractions that found text are cached. Cache errors are logged and the
+    article is extracted directly.
+    """
+    # Imported on first use: the parsers (newspaper3k, trafilatura, lxml) are slow to import.
+    from app.text_extraction import extract_text_from_url
+
+    if not Config.EXTRACTION_CACHE_ENABLED:
+        return extract_text_from_url(url)
+    try:
+        cached = get_extraction_cache().get(url)
+        if cached is not None:
+            logging.info(f"Using cached extraction for {url}")
+            return cached
+    except sqlite3.Error as e:
+        logging.error(f"Could not read the extraction cache for {url}: {e}")
+
+    article_data = extract_text_from_url(url)
+    if article_data.get("text"):
+        try:
+            get_extraction_cache().set(url, article_data)
+        except sqlite3.Error as e:
+            logging.error(f"Could not write the extraction cache for {url}: {e}")
+    return article_data
@@ -2,7 +2,7 @@ import os
 import re
 import logging
 from datetime import datetime
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 from typing import Optional, Dict, Union
 
 # Limit for filename length to ensure compatibility with most filesystems.
@@ -18,6 +18,29 @@ SOURCE_NAME_MAPPING = {
     "bbc.com": "BBC",
 }
 
+# Query parameters that only track where a click came from and never change the article.
+TRACKING_QUERY_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "smid", "ref", "ref_src", "cmpid", "sh"}
+
+def normalize_url(url: str) -> str:
+    """Normalizes an article URL so equivalent submissions share one key.
+
+    Lowercases the scheme and host, drops a leading "www.", default ports, fragments, trailing
+    slashes and tracking parameters (utm_* and friends), and sorts the query.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parsed.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_QUERY_PARAMS
+    ))
+    return urlunparse((scheme, netloc, path, "", query, ""))
+
 def get_human_readable_source(url: str) -> str:
     """Extracts a human-readable source name from the URL."""
     domain = urlparse(url).netloc.replace("www.", "").lower()
@@ -69,6 +92,36 @@ def create_directory_if_not_exists(directory: str) -> None:
         logging.error(f"Failed to create directory '{directory}': {e}")
         raise OSError(f"Failed to create directory {directory}: {e}")
 
+def cleanup_downloads(directory: str = "downloads", max_age_seconds: float = 86400, max_bytes: int = 1024 ** 3) -> int:
+    """Deletes files in `directory` older than `max_age_seconds`, then the oldest until the rest fit in `max_bytes`.
+
+    Returns the number of files removed.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    now = datetime.now().timestamp()
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+
+    removed = 0
+    total_bytes = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if now - mtime <= max_age_seconds and total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            removed += 1
+            total_bytes -= size
+        except OSError as e:
+            logging.warning(f"Could not remove '{path}': {e}")
+    if removed:
+        logging.info(f"Removed {removed} old files from '{directory}'.")
+    return removed
+
 def extract_metadata(article_metadata: Dict[str, Union[str, list]]) -> Dict[str, str]:
     """Extracts and formats additional metadata from the article."""
     # Extract the first author, or set to 'Unknown Author' if none is provided
@@ -1,11 +1,42 @@
+import base64
 import datetime
+import json
 import logging
 import time
+from typing import Optional, Sequence
 from google.cloud import firestore
 from google.api_core.exceptions import GoogleAPICallError, RetryError
+from config import Config
+from app import listen_counters
+from app.article_cache import cached_read, invalidate_articles
+from app.file_management import normalize_url
+from app.gcp_clients import get_firestore_client
 
-# Firestore client
-firestore_client = firestore.Client()
+# Fields rendered by the list views. List reads project to these with select(), so the
+# article text (most of each document's bytes) is only loaded by get_article_by_id.
+ARTICLE_LIST_FIELDS = (
+    "title", "source", "url", "publish_date", "processed_date", "download_link",
+    "authors", "hashtags", "voice_name", "audio_length", "listen_count",
+)
+
+def _project(query, fields: Optional[Sequence[str]]):
+    """Applies a field projection to `query`; `fields=None` returns whole documents."""
+    return query.select(list(fields)) if fields else query
+
+# Deleted article ids with their deletion time, so incremental replica syncs can drop them.
+TOMBSTONES_COLLECTION = "article_tombstones"
+
+# Article fields held by the full-text search index.
+SEARCH_FIELDS = {"title", "authors", "text_content", "url", "source", "processed_date"}
+
+def _apply_to_replica(article_id: str, data: Optional[dict]) -> None:
+    # Imported here: app.article_replica imports this module.
+    from app.article_replica import apply_local_write
+    apply_local_write(article_id, data)
+
+def _apply_to_search_index(article_id: str, data: Optional[dict]) -> None:
+    from app.search_index import apply_local_write
+    apply_local_write(article_id, data)
 
 def retry_on_failure(max_retries=3, delay=2):
     """Decorator for retrying Firestore operations in case of failure."""
@@ -33,12 +64,15 @@ def save_article_metadata(title, source, url, publish_date, download_link, autho
             "title": title,
             "source": source,
             "url": url,
+            "normalized_url": normalize_url(url),
             "publish_date": publish_date,
             "processed_date": datetime.datetime.now().strftime("%Y-%m-%d"),
             "download_link": download_link,
             "authors": authors,
             "text_content": text_content,
             "hashtags": hashtags,
+            "listen_count": 0,
+            "updated_at": firestore.SERVER_TIMESTAMP,
         }
 
         if voice_name:
@@ -46,7 +80,10 @@ def save_article_metadata(title, source, url, publish_date, download_link, autho
         if audio_length is not None:
             article_data["audio_length"] = audio_length
 
-        doc_ref = firestore_client.collection("articles").add(article_data)
+        doc_ref = get_firestore_client().collection("articles").add(article_data)
+        invalidate_articles()
+        _apply_to_replica(doc_ref[1].id, article_data)
+        _apply_to_search_index(doc_ref[1].id, article_data)
         logging.info(f"Article metadata saved for URL: {url} with hashtags: {hashtags}")
         return doc_ref[1].id
     except Exception as e:
@@ -54,10 +91,10 @@ def save_article_metadata(title, source, url, publish_date, download_link, autho
         raise
     
 @retry_on_failure()
-def get_all_articles():
+def get_all_articles(fields: Optional[Sequence[str]] = ARTICLE_LIST_FIELDS):
     """Fetches all articles from Firestore and returns them as dictionaries."""
     try:
-        articles_ref = firestore_client.collection("articles")
+        articles_ref = _project(get_firestore_client().collection("articles"), fields)
         articles = articles_ref.stream()
         all_articles = [{**article.to_dict(), "id": article.id} for article in articles]
         logging.info(f"Fetched {len(all_articles)} articles from Firestore.")
@@ -66,11 +103,91 @@ def get_all_articles():
         logging.error(f"Firestore error while retrieving all articles: {e}")
         return []
 
+# Fields the article list can be ordered by. Each is written by save_article_metadata for
+# every article (Firestore leaves documents missing the order_by field out of the results).
+SORTABLE_FIELDS = ("processed_date", "publish_date", "title", "source")
+
+def encode_page_token(cursor: dict) -> str:
+    """Encodes a page cursor as an opaque URL-safe token."""
+    return base64.urlsafe_b64encode(json.dumps(cursor, default=str).encode("utf-8")).decode("ascii")
+
+def decode_page_token(token: str) -> dict:
+    """Decodes a token produced by encode_page_token; raises ValueError if it is malformed."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid page token: {e}")
+
+@retry_on_failure()
+def get_articles_page(sort_by: str = "processed_date", order: str = "desc", page_size: int = 10,
+                      page_token: str = None, hashtag: str = None,
+                      fields: Optional[Sequence[str]] = ARTICLE_LIST_FIELDS) -> dict:
+    """Fetches one page of articles using Firestore cursors instead of reading the whole collection.
+
+    Results are ordered by `sort_by` then document id, so cursors stay stable when
+    values repeat. Returns a dict with "articles", "next_page_token" and
+    "prev_page_token" (None when there is no such page). Filtering by `hashtag`
+    relies on the composite indexes in firestore.indexes.json.
+    """
+    if sort_by not in SORTABLE_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort_by}")
+    direction = firestore.Query.DESCENDING if order == "desc" else firestore.Query.ASCENDING
+
+    cursor = decode_page_token(page_token) if page_token else None
+    if cursor and (cursor.get("sort_by"), cursor.get("order"), cursor.get("hashtag")) != (sort_by, order, hashtag):
+        cursor = None  # Token belongs to a different listing; start from the first page.
+
+    query = _project(get_firestore_client().collection("articles"), fields)
+    if hashtag:
+        query = query.where("hashtags", "array_contains", hashtag)
+    query = query.order_by(sort_by, direction=direction).order_by("__name__", direction=direction)
+
+    backwards = bool(cursor) and cursor.get("direction") == "prev"
+    if backwards:
+        query = query.end_before(list(cursor["values"])).limit_to_last(page_size + 1)
+    elif cursor:
+        query = query.start_after(list(cursor["values"])).limit(page_size + 1)
+    else:
+        query = query.limit(page_size + 1)
+
+    try:
+        # Query.get() rather than stream(): limit_to_last queries cannot be streamed.
+        documents = query.get()
+    except Exception as e:
+        logging.error(f"Firestore error while fetching a page of articles: {e}")
+        raise
+
+    has_more = len(documents) > page_size
+    if backwards:
+        documents = documents[1:] if has_more else documents
+    else:
+        documents = documents[:page_size]
+    articles = [{**doc.to_dict(), "id": doc.id} for doc in documents]
+
+    def token_for(article: dict, page_direction: str) -> str:
+        return encode_page_token({
+            "sort_by": sort_by,
+            "order": order,
+            "hashtag": hashtag,
+            "direction": page_direction,
+            "values": [article.get(sort_by), article["id"]],
+        })
+
+    has_next = has_more if not backwards else True
+    has_prev = has_more if backwards else bool(cursor)
+    logging.info(f"Fetched a page of {len(articles)} articles sorted by {sort_by} {order}.")
+    return {
+        "articles": articles,
+        "next_page_token": token_for(articles[-1], "next") if articles and has_next else None,
+        "prev_page_token": token_for(articles[0], "prev") if articles and has_prev else None,
+    }
+
+@cached_read("recent_articles")
 @retry_on_failure()
-def get_recent_articles(limit: int = 5) -> list:
+def get_recent_articles(limit: int = 5, fields: Optional[Sequence[str]] = ARTICLE_LIST_FIELDS) -> list:
     """Fetches a limited number of recently processed articles."""
     try:
-        articles_ref = firestore_client.collection("articles").order_by("processed_date", direction=firestore.Query.DESCENDING).limit(limit)
+        articles_ref = _project(get_firestore_client().collection("articles"), fields).order_by("processed_date", direction=firestore.Query.DESCENDING).limit(limit)
         articles = articles_ref.stream()
         return [{**article.to_dict(), "id": article.id} for article in articles]
     except Exception as e:
@@ -81,8 +198,13 @@ def get_recent_articles(limit: int = 5) -> list:
 def update_article(article_id: str, update_data: dict):
     """Updates specific fields of an article in Firestore."""
     try:
-        article_ref = firestore_client.collection("articles").document(article_id)
-        article_ref.update(update_data)
+        article_ref = get_firestore_client().collection("articles").document(article_id)
+        article_ref.update({**update_data, "updated_at": firestore.SERVER_TIMESTAMP})
+        invalidate_articles()
+        if Config.ARTICLE_READ_SOURCE == "replica" or SEARCH_FIELDS & update_data.keys():
+            article = article_ref.get().to_dict()
+            _apply_to_replica(article_id, article)
+            _apply_to_search_index(article_id, article)
         logging.info(f"Article with ID {article_id} updated successfully with data: {update_data}")
     except Exception as e:
         logging.error(f"Firestore error while updating article metadata: {e}")
@@ -92,20 +214,28 @@ def update_article(article_id: str, update_data: dict):
 def get_listen_count(article_id: str) -> int:
     """Returns the listen count for a given article ID."""
     try:
-        article_ref = firestore_client.collection("articles").document(article_id)
-        listens_ref = article_ref.collection("listens")
-        listen_count = sum(1 for _ in listens_ref.stream())
+        listen_count = listen_counters.get_listen_count(article_id)
         logging.info(f"Listen count for article ID {article_id}: {listen_count}")
         return listen_count
     except Exception as e:
         logging.error(f"Firestore error while counting listens: {e}")
         return 0
 
+@retry_on_failure()
+def get_listen_counts(articles: list) -> dict:
+    """Returns {article_id: listen_count} for listed articles, mostly from their rolled-up count."""
+    try:
+        return listen_counters.get_listen_counts(articles)
+    except Exception as e:
+        logging.error(f"Firestore error while counting listens for {len(articles)} articles: {e}")
+        return {article["id"]: 0 for article in articles}
+
+@cached_read("article_by_id")
 @retry_on_failure()
 def get_article_by_id(article_id: str):
     """Fetches an article from Firestore by its ID."""
     try:
-        article_ref = firestore_client.collection("articles").document(article_id)
+        article_ref = get_firestore_client().collection("articles").document(article_id)
         article = article_ref.get()
         if article.exists:
             logging.info(f"Article with ID {article_id} fetched successfully.")
@@ -117,13 +247,21 @@ def get_article_by_id(article_id: str):
         logging.error(f"Firestore error while fetching article by ID: {e}")
         raise
 
+@cached_read("article_by_url")
 @retry_on_failure()
 def get_article_by_url(url: str):
-    """Fetches an article from Firestore based on its URL."""
+    """Fetches an article from Firestore based on its URL.
+
+    Matches on the normalized URL first, so equivalent URLs (tracking parameters,
+    trailing slashes, "www.") resolve to the same article; documents saved before
+    `normalized_url` existed are still found by their exact URL.
+    """
     try:
-        articles_ref = firestore_client.collection("articles")
-        query = articles_ref.where("url", "==", url).limit(1).stream()
+        articles_ref = get_firestore_client().collection("articles")
+        query = articles_ref.where("normalized_url", "==", normalize_url(url)).limit(1).stream()
         article = next(query, None)
+        if not article:
+            article = next(articles_ref.where("url", "==", url).limit(1).stream(), None)
         if article:
             logging.info(f"Article with URL {url} fetched successfully.")
             return {**article.to_dict(), "id": article.id}
@@ -136,19 +274,27 @@ def get_article_by_url(url: str):
 
 @retry_on_failure()
 def delete_article_by_id(article_id: str):
-    """Deletes an article from Firestore by its ID."""
+    """Deletes an article from Firestore by its ID, leaving a tombstone for replica syncs."""
     try:
-        firestore_client.collection("articles").document(article_id).delete()
+        client = get_firestore_client()
+        batch = client.batch()
+        batch.delete(client.collection("articles").document(article_id))
+        batch.set(client.collection(TOMBSTONES_COLLECTION).document(article_id),
+                  {"deleted_at": firestore.SERVER_TIMESTAMP})
+        batch.commit()
+        invalidate_articles()
+        _apply_to_replica(article_id, None)
+        _apply_to_search_index(article_id, None)
         logging.info(f"Article with ID {article_id} deleted successfully.")
     except Exception as e:
         logging.error(f"Firestore error while deleting article: {e}")
         raise
 
 @retry_on_failure()
-def get_articles_by_hashtag(hashtag: str) -> list:
+def get_articles_by_hashtag(hashtag: str, fields: Optional[Sequence[str]] = ARTICLE_LIST_FIELDS) -> list:
     """Fetches all articles containing a specific hashtag."""
     try:
-        articles_ref = firestore_client.collection("articles").where("hashtags", "array_contains", hashtag)
+        articles_ref = _project(get_firestore_client().collection("articles"), fields).where("hashtags", "array_contains", hashtag)
         articles = articles_ref.stream()
         articles_with_hashtag = [{**article.to_dict(), "id": article.id} for article in articles]
         logging.info(f"Fetched {len(articles_with_hashtag)} articles with hashtag #{hashtag}.")
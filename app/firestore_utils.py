@@ -1,9 +1,11 @@
 import datetime
 import logging
 from google.cloud import firestore
-
-# Firestore client
-firestore_client = firestore.Client()
+from config import Config
+from app.gcp_clients import get_firestore_client
+from app.article_cache import cached_read
+from app.listen_buffer import get_listen_buffer
+from app.listen_counters import get_listen_count, record_listen
 
 def log_listen_event(article_id: str, count_only=False) -> int:
     """Logs a listen event or returns the listen count for a given article ID.
@@ -16,24 +18,22 @@ def log_listen_event(article_id: str, count_only=False) -> int:
         int: Listen count if `count_only` is True, else returns 1 on success, 0 on failure.
     """
     try:
-        article_ref = firestore_client.collection("articles").document(article_id)
-        listens_ref = article_ref.collection("listens")
-
         if count_only:
-            listen_count = sum(1 for _ in listens_ref.stream())  # Efficiently count listens
+            listen_count = get_listen_count(article_id)
             logging.info(f"Listen count retrieved for article ID {article_id}: {listen_count}")
             return listen_count
+        elif Config.LISTEN_BUFFER_ENABLED:
+            # Written to Firestore by the buffer's next batch flush.
+            return 1 if get_listen_buffer().add(article_id) else 0
         else:
-            listen_data = {
-                "listen_date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            listens_ref.add(listen_data)
+            record_listen(article_id)
             logging.info(f"Listen event logged for article ID: {article_id}")
             return 1
     except Exception as e:
         logging.error(f"Firestore error in log_listen_event: {e}")
         return 0
 
+@cached_read("article_id_by_filename")
 def get_article_id_by_filename(filename: str) -> str:
     """Fetches the article ID based on the audio filename.
     
@@ -44,7 +44,7 @@ def get_article_id_by_filename(filename: str) -> str:
         str: The article ID if found, else None.
     """
     try:
-        articles_ref = firestore_client.collection("articles")
+        articles_ref = get_firestore_client().collection("articles")
         query = articles_ref.where("download_link", "==", filename).limit(1).stream()
         article = next(query, None)
         if article:
@@ -85,7 +85,7 @@ def get_recent_activity(article_id: str, limit: int = 5) -> list:
         list: List of recent listen events, each as a dictionary.
     """
     try:
-        article_ref = firestore_client.collection("articles").document(article_id)
+        article_ref = get_firestore_client().collection("articles").document(article_id)
         listens_ref = article_ref.collection("listens").order_by("listen_date", direction=firestore.Query.DESCENDING).limit(limit)
         listens = listens_ref.stream()
         recent_activity = [{"listen_date": listen.to_dict().get("listen_date")} for listen in listens]
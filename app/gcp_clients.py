@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
+from google.cloud import firestore
+from google.cloud.firestore_v1.services.firestore import client as firestore_gapic_client
+from google.cloud.firestore_v1.services.firestore.transports import grpc as firestore_grpc
+from config import Config
+
+if TYPE_CHECKING:
+    from google.cloud import storage, texttospeech
+
+# One instance of each Google Cloud client per process, created on first use. gRPC channels
+# and HTTP connection pools must not be shared across fork(), so a child process (gunicorn
+# workers, multiprocessing) starts with an empty registry and builds its own clients.
+_clients: Dict[str, object] = {}
+_clients_pid = os.getpid()
+_clients_lock = threading.Lock()
+
+def grpc_channel_options() -> List[Tuple[str, int]]:
+    """gRPC channel options applied to the Firestore and Text-to-Speech channels."""
+    return [
+        ("grpc.keepalive_time_ms", Config.GRPC_KEEPALIVE_TIME_MS),
+        ("grpc.keepalive_timeout_ms", Config.GRPC_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.max_send_message_length", Config.GRPC_MAX_MESSAGE_BYTES),
+        ("grpc.max_receive_message_length", Config.GRPC_MAX_MESSAGE_BYTES),
+    ]
+
+def _merge_options(options) -> List[Tuple[str, int]]:
+    merged = dict(options or ())
+    merged.update(grpc_channel_options())
+    return list(merged.items())
+
+class _FirestoreTransport(firestore_grpc.FirestoreGrpcTransport):
+    """Firestore transport whose channels use grpc_channel_options()."""
+
+    @classmethod
+    def create_channel(cls, host="firestore.googleapis.com", credentials=None, options=None, **kwargs):
+        return super().create_channel(host, credentials=credentials, options=_merge_options(options), **kwargs)
+
+class _FirestoreClient(firestore.Client):
+    """firestore.Client that builds its channel with the configured gRPC options."""
+
+    @property
+    def _firestore_api(self):
+        return self._firestore_api_helper(_FirestoreTransport, firestore_gapic_client.FirestoreClient, firestore_gapic_client)
+
+def _create_firestore_client() -> firestore.Client:
+    return _FirestoreClient()
+
+# The Storage and Text-to-Speech libraries are imported by their factories, so processes
+# that never upload or synthesize (most web requests) don't pay for them at startup.
+def _create_storage_client() -> "storage.Client":
+    import google.auth
+    import requests
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import storage
+
+    credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=Config.GCS_HTTP_POOL_SIZE, pool_maxsize=Config.GCS_HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    return storage.Client(project=project, credentials=credentials, _http=session)
+
+def _create_tts_client() -> "texttospeech.TextToSpeechClient":
+    from google.cloud import texttospeech
+    from google.cloud.texttospeech_v1.services.text_to_speech.transports import TextToSpeechGrpcTransport
+
+    channel = TextToSpeechGrpcTransport.create_channel(options=grpc_channel_options())
+    return texttospeech.TextToSpeechClient(transport=TextToSpeechGrpcTransport(channel=channel))
+
+_FACTORIES: Dict[str, Callable[[], object]] = {
+    "firestore": _create_firestore_client,
+    "storage": _create_storage_client,
+    "texttospeech": _create_tts_client,
+}
+
+def _reset_after_fork() -> None:
+    global _clients, _clients_pid, _clients_lock
+    _clients = {}
+    _clients_pid = os.getpid()
+    _clients_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _get_client(name: str):
+    if _clients_pid != os.getpid():
+        _reset_after_fork()
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = _FACTORIES[name]()
+                logging.info(f"Created {name} client for process {os.getpid()}.")
+    return client
+
+def get_firestore_client() -> firestore.Client:
+    """Returns this process's shared Firestore client."""
+    return _get_client("firestore")
+
+def get_storage_client() -> "storage.Client":
+    """Returns this process's shared Cloud Storage client (pooled HTTP connections)."""
+    return _get_client("storage")
+
+def get_tts_client() -> "texttospeech.TextToSpeechClient":
+    """Returns this process's shared Text-to-Speech client."""
+    return _get_client("texttospeech")
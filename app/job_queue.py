@@ -0,0 +1,185 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+from config import Config
+from db_setup import initialize_database
+
+class JobQueueError(Exception):
+    """Raised when a job queue backend cannot be used."""
+    pass
+
+class JobQueueBackend(ABC):
+    """Interface for job queue backends (SQLite today; Cloud Tasks or Pub/Sub later).
+
+    Jobs are dictionaries with at least: id, job_type, payload, status
+    ("queued", "running", "succeeded" or "failed"), stage, progress (0..1),
+    result, error, attempts, created_at and updated_at.
+    """
+
+    @abstractmethod
+    def enqueue(self, job_type: str, payload: dict) -> str:
+        """Adds a job and returns its id."""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """Marks the next runnable job as running for `worker_id` and returns it, or None."""
+
+    @abstractmethod
+    def update_progress(self, job_id: str, stage: str, progress: float) -> None:
+        """Records the stage and progress of a running job."""
+
+    @abstractmethod
+    def complete(self, job_id: str, result: dict) -> None:
+        """Marks a job as succeeded with its result."""
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str, retry: bool = True) -> None:
+        """Marks a job as failed, re-queueing it with backoff if `retry` and attempts remain."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """Returns a job by id, or None."""
+
+class SQLiteJobQueue(JobQueueBackend):
+    """Job queue stored in the local SQLite database, shared by the web and worker processes."""
+
+    def __init__(self, db_path: str, max_attempts: int = 3, lease_seconds: int = 1800):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        initialize_database(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def enqueue(self, job_type: str, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                """INSERT INTO jobs (id, job_type, payload, status, stage, progress, attempts,
+                                     available_at, created_at, updated_at)
+                   VALUES (?, ?, ?, 'queued', 'queued', 0, 0, ?, ?, ?)""",
+                (job_id, job_type, json.dumps(payload), now, now, now),
+            )
+        finally:
+            conn.close()
+        logging.info(f"Enqueued {job_type} job {job_id}")
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[dict]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Running jobs whose worker stopped reporting progress are handed out again,
+            # unless they have used up their attempts (e.g. a job that keeps crashing its worker).
+            stale_before = now - self.lease_seconds
+            conn.execute(
+                """UPDATE jobs SET status = 'failed', stage = 'failed', updated_at = ?,
+                                   error = 'Worker stopped responding; no attempts left.'
+                   WHERE status = 'running' AND updated_at < ? AND attempts >= ?""",
+                (now, stale_before, self.max_attempts),
+            )
+            row = conn.execute(
+                """SELECT * FROM jobs
+                   WHERE (status = 'queued' AND available_at <= ?)
+                      OR (status = 'running' AND updated_at < ? AND attempts < ?)
+                   ORDER BY created_at LIMIT 1""",
+                (now, stale_before, self.max_attempts),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                """UPDATE jobs SET status = 'running', stage = 'starting', worker_id = ?,
+                                   attempts = attempts + 1, started_at = ?, updated_at = ?
+                   WHERE id = ?""",
+                (worker_id, now, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(row["id"])
+
+    def update_progress(self, job_id: str, stage: str, progress: float) -> None:
+        self._update(job_id, "stage = ?, progress = ?", (stage, round(progress, 3)))
+
+    def complete(self, job_id: str, result: dict) -> None:
+        self._update(
+            job_id,
+            "status = 'succeeded', stage = 'done', progress = 1, result = ?, error = NULL",
+            (json.dumps(result),),
+        )
+
+    def fail(self, job_id: str, error: str, retry: bool = True) -> None:
+        job = self.get(job_id)
+        if job and retry and job["attempts"] < self.max_attempts:
+            backoff_time = 2 ** job["attempts"] * 30
+            logging.warning(f"Job {job_id} failed (attempt {job['attempts']}/{self.max_attempts}); retrying in {backoff_time} seconds.")
+            self._update(
+                job_id,
+                "status = 'queued', stage = 'retrying', error = ?, available_at = ?",
+                (error, time.time() + backoff_time),
+            )
+        else:
+            logging.error(f"Job {job_id} failed permanently: {error}")
+            self._update(job_id, "status = 'failed', stage = 'failed', error = ?", (error,))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _update(self, job_id: str, assignments: str, params: tuple) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*params, time.time(), job_id),
+            )
+        finally:
+            conn.close()
+
+# Factories for the backends selectable with JOB_QUEUE_BACKEND.
+JOB_QUEUE_BACKENDS: Dict[str, Callable[[], JobQueueBackend]] = {
+    "sqlite": lambda: SQLiteJobQueue(Config.SQLITE_DB_PATH, Config.JOB_MAX_ATTEMPTS, Config.JOB_LEASE_SECONDS),
+}
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def register_job_queue_backend(name: str, factory: Callable[[], JobQueueBackend]) -> None:
+    """Makes another backend (e.g. Cloud Tasks or Pub/Sub) selectable by name."""
+    JOB_QUEUE_BACKENDS[name] = factory
+
+def get_job_queue() -> JobQueueBackend:
+    """Returns the process-wide job queue for the configured backend."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            factory = JOB_QUEUE_BACKENDS.get(Config.JOB_QUEUE_BACKEND)
+            if factory is None:
+                raise JobQueueError(f"Unknown job queue backend: {Config.JOB_QUEUE_BACKEND}")
+            _job_queue = factory()
+        return _job_queue
@@ -0,0 +1,140 @@
+import atexit
+import datetime
+import logging
+import random
+import threading
+from collections import Counter, deque
+from typing import Dict, Optional
+from google.cloud import firestore
+from config import Config
+from app.gcp_clients import get_firestore_client
+from app.listen_counters import LISTENS_COLLECTION, SHARDS_COLLECTION, increment_rollups
+
+# Firestore rejects batches with more than 500 writes.
+MAX_BATCH_WRITES = 500
+
+class ListenEventBuffer:
+    """Collects listen events in memory and writes them to Firestore in batches.
+
+    A background thread flushes once `max_events` are pending or every `flush_interval`
+    seconds. Each flush writes one document per listen plus a single shard Increment per
+    article, then one Increment of each article's rolled-up `listen_count`. Events arriving while `max_pending` are already waiting are dropped and
+    counted, as are events whose flush keeps failing once the buffer is full.
+    """
+
+    def __init__(self, max_events: int = 100, flush_interval: float = 5.0, max_pending: int = 10000):
+        # Each event needs one listen write and at most one increment, so a flush of
+        # max_events fits in a single (atomic) batch and can safely be retried.
+        self.max_events = max(1, min(max_events, MAX_BATCH_WRITES // 2))
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    def add(self, article_id: str) -> bool:
+        """Queues a listen for `article_id`; returns False if it was dropped."""
+        with self._lock:
+            if self._closed or len(self._events) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._events.append((article_id, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            pending = len(self._events)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="listen-buffer", daemon=True)
+                self._thread.start()
+        if pending >= self.max_events:
+            self._wakeup.set()
+        return True
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Writes every pending event to Firestore; returns how many were written."""
+        with self._flush_lock:
+            written = 0
+            while True:
+                with self._lock:
+                    events = [self._events.popleft() for _ in range(min(len(self._events), self.max_events))]
+                if not events:
+                    return written
+                try:
+                    self._write(events)
+                except Exception as e:
+                    logging.error(f"Firestore error while flushing {len(events)} listen events: {e}")
+                    self._requeue(events)
+                    return written
+                written += len(events)
+                with self._lock:
+                    self.flushed += len(events)
+
+    def _write(self, events: list) -> None:
+        client = get_firestore_client()
+        batch = client.batch()
+        for article_id, listen_date in events:
+            article_ref = client.collection("articles").document(article_id)
+            batch.set(article_ref.collection(LISTENS_COLLECTION).document(), {"listen_date": listen_date})
+        for article_id, count in Counter(article_id for article_id, _ in events).items():
+            shard_id = str(random.randrange(Config.LISTEN_COUNTER_SHARDS))
+            shard_ref = client.collection("articles").document(article_id).collection(SHARDS_COLLECTION).document(shard_id)
+            batch.set(shard_ref, {"count": firestore.Increment(count)}, merge=True)
+        batch.commit()
+        try:
+            increment_rollups(Counter(article_id for article_id, _ in events))
+        except Exception as e:
+            # The listens are stored; requeueing them would count them twice.
+            logging.error(f"Firestore error while rolling up {len(events)} listen events: {e}")
+
+    def _requeue(self, events: list) -> None:
+        with self._lock:
+            self.failed_flushes += 1
+            room = max(self.max_pending - len(self._events), 0)
+            self.dropped += max(len(events) - room, 0)
+            self._events.extendleft(reversed(events[:room]))
+
+    def close(self) -> None:
+        """Stops accepting events and flushes what is pending (called at interpreter exit)."""
+        with self._lock:
+            self._closed = True
+        self._wakeup.set()
+        self.flush()
+        with self._lock:
+            if self._events:
+                logging.warning(f"Dropping {len(self._events)} listen events that could not be flushed.")
+                self.dropped += len(self._events)
+                self._events.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._events),
+                "dropped": self.dropped,
+                "flushed": self.flushed,
+                "failed_flushes": self.failed_flushes,
+            }
+
+_listen_buffer = None
+_listen_buffer_lock = threading.Lock()
+
+def get_listen_buffer() -> ListenEventBuffer:
+    """Returns the process-wide listen buffer, flushed at interpreter exit."""
+    global _listen_buffer
+    with _listen_buffer_lock:
+        if _listen_buffer is None:
+            _listen_buffer = ListenEventBuffer(
+                max_events=Config.LISTEN_BUFFER_MAX_EVENTS,
+                flush_interval=Config.LISTEN_BUFFER_FLUSH_INTERVAL,
+                max_pending=Config.LISTEN_BUFFER_MAX_PENDING,
+            )
+            atexit.register(_listen_buffer.close)
+        return _listen_buffer
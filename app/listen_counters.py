@@ -0,0 +1,135 @@
+import datetime
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from google.api_core.exceptions import NotFound
+from google.cloud import firestore
+from config import Config
+from app.gcp_clients import get_firestore_client
+
+# Listens stay in articles/{id}/listens; the counter lives in articles/{id}/listen_counter_shards/{n}.
+# Shards are separate documents so popular articles are not capped by the per-document write rate.
+# The article document also keeps a rolled-up `listen_count`, incremented at most once per article
+# per listen-buffer flush and returned by the list projection, so list views read no shards.
+LISTENS_COLLECTION = "listens"
+SHARDS_COLLECTION = "listen_counter_shards"
+ROLLUP_FIELD = "listen_count"
+
+def _article_ref(article_id: str):
+    return get_firestore_client().collection("articles").document(article_id)
+
+def record_listen(article_id: str) -> None:
+    """Writes a listen event and increments one random counter shard in the same batch, then the rollup."""
+    article_ref = _article_ref(article_id)
+    shard_ref = article_ref.collection(SHARDS_COLLECTION).document(str(random.randrange(Config.LISTEN_COUNTER_SHARDS)))
+    batch = get_firestore_client().batch()
+    batch.set(article_ref.collection(LISTENS_COLLECTION).document(), {
+        "listen_date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+    batch.set(shard_ref, {"count": firestore.Increment(1)}, merge=True)
+    batch.commit()
+    increment_rollups({article_id: 1})
+
+def increment_rollups(counts: Dict[str, int]) -> None:
+    """Adds listens to the rolled-up `listen_count` of each article.
+
+    Runs after the listens and shards are committed. update() never recreates an article
+    deleted in the meantime; those are skipped. A rollup that fails to commit only drifts
+    from the shards (the exact count) until the next backfill.
+    """
+    client = get_firestore_client()
+    batch = client.batch()
+    for article_id, count in counts.items():
+        batch.update(_article_ref(article_id), {ROLLUP_FIELD: firestore.Increment(count)})
+    try:
+        batch.commit()
+    except NotFound:
+        for article_id, count in counts.items():
+            try:
+                _article_ref(article_id).update({ROLLUP_FIELD: firestore.Increment(count)})
+            except NotFound:
+                logging.info(f"Article {article_id} no longer exists; not rolling up its listens.")
+
+def count_listens(article_id: str) -> int:
+    """Counts the listens subcollection with a server-side count() aggregation."""
+    result = _article_ref(article_id).collection(LISTENS_COLLECTION).count(alias="listens").get()
+    return int(result[0][0].value) if result and result[0] else 0
+
+def sum_shards(shards: Iterable) -> Optional[int]:
+    """Sums counter shard snapshots; returns None when there are none (counter not set up yet)."""
+    total, found = 0, False
+    for shard in shards:
+        if shard.exists:
+            found = True
+            total += (shard.to_dict() or {}).get("count", 0)
+    return total if found else None
+
+def get_listen_count(article_id: str) -> int:
+    """Returns the exact listen count of an article from its counter shards.
+
+    Reads at most LISTEN_COUNTER_SHARDS small documents. Articles whose counter has not
+    been backfilled yet (no shards) fall back to a count() aggregation over the listens.
+    """
+    total = sum_shards(_article_ref(article_id).collection(SHARDS_COLLECTION).stream())
+    if total is None:
+        total = count_listens(article_id)
+    return total
+
+def get_listen_counts(articles: List[dict]) -> Dict[str, int]:
+    """Returns the listen counts of listed articles from their rolled-up `listen_count` field.
+
+    Article dicts read with the list projection already hold the field, so they cost no
+    reads. Others (such as replica rows) are fetched with one get_all of that field only.
+    Articles without a rollup (not backfilled yet) are counted with count() aggregations
+    run concurrently. The rollup can trail the shards by a failed flush; use
+    get_listen_count for the exact value.
+    """
+    counts = {
+        article["id"]: article[ROLLUP_FIELD]
+        for article in articles if article.get(ROLLUP_FIELD) is not None
+    }
+    missing = list(dict.fromkeys(article["id"] for article in articles if article["id"] not in counts))
+    if missing:
+        snapshots = get_firestore_client().get_all([_article_ref(article_id) for article_id in missing],
+                                                   field_paths=[ROLLUP_FIELD])
+        for snapshot in snapshots:
+            value = (snapshot.to_dict() or {}).get(ROLLUP_FIELD) if snapshot.exists else None
+            if value is not None:
+                counts[snapshot.id] = value
+        missing = [article_id for article_id in missing if article_id not in counts]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), 10)) as executor:
+            counts.update(zip(missing, executor.map(count_listens, missing)))
+    return counts
+
+def backfill_listen_counter(article_id: str) -> int:
+    """Resets an article's counter shards and rolled-up `listen_count` to the number of listen documents it has.
+
+    Listens recorded between the count and the batch commit are not included; rerun
+    the backfill if listens were being written while it ran.
+    """
+    total = count_listens(article_id)
+    shards_ref = _article_ref(article_id).collection(SHARDS_COLLECTION)
+    batch = get_firestore_client().batch()
+    for shard_ref in shards_ref.list_documents():
+        if shard_ref.id != "0":
+            batch.delete(shard_ref)
+    batch.set(shards_ref.document("0"), {"count": total})
+    batch.update(_article_ref(article_id), {ROLLUP_FIELD: total})
+    batch.commit()
+    return total
+
+def backfill_listen_counters(article_ids: Optional[Iterable[str]] = None) -> int:
+    """Backfills the counters of the given articles (all articles by default); returns how many were updated."""
+    if article_ids is None:
+        article_ids = (doc.id for doc in get_firestore_client().collection("articles").list_documents())
+    updated = 0
+    for article_id in article_ids:
+        try:
+            total = backfill_listen_counter(article_id)
+            updated += 1
+            logging.info(f"Backfilled listen counter for article ID {article_id}: {total}")
+        except Exception as e:
+            logging.error(f"Firestore error while backfilling listen counter for {article_id}: {e}")
+    return updated
@@ -1,60 +1,73 @@
 import logging
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
+from flask import Blueprint, Response, request, jsonify, render_template, redirect, url_for, flash
+from markupsafe import Markup, escape
 from app.firestore_database_operations import (
-    save_article_metadata,
-    get_all_articles,
-    get_recent_articles,
+    SORTABLE_FIELDS,
+    get_listen_counts,
     get_article_by_id,
     update_article,
-    get_articles_by_hashtag,
     delete_article_by_id,
+    get_article_by_url,
 )
 from app.firestore_utils import log_listen_event
-from app.file_management import generate_audio_file_path
-from app.text_extraction import extract_text_from_url
-from app.text_to_speech_service import text_to_speech
-from app.cloud_storage import upload_to_gcs
+from app.listen_buffer import get_listen_buffer
+from app.search_index import SNIPPET_END, SNIPPET_START, get_search_index
+from app.audio_streams import get_audio_streams
+from app.job_queue import get_job_queue
+from app.services import (
+    ArticleInProgressError,
+    get_articles_listing,
+    get_recent_listing,
+    start_article_stream,
+    validate_url,
+    process_article as run_article_pipeline,
+)
+from config import Config
 
 main = Blueprint("main", __name__)
 
 @main.route("/")
 def index():
     try:
-        recent_articles = get_recent_articles(limit=5)
-        return render_template("index.html", recent_articles=recent_articles)
+        recent_articles = get_recent_listing(limit=5)
+        return render_template(
+            "index.html",
+            recent_articles=recent_articles,
+            stream_playback_enabled=Config.STREAM_PLAYBACK_ENABLED,
+        )
     except Exception as e:
         logging.error(f"Error loading index: {e}")
         flash("An error occurred while loading the homepage.")
         return redirect(url_for("main.index"))
 
+def _attach_listen_counts(articles: list) -> None:
+    listen_counts = get_listen_counts(articles)
+    for article in articles:
+        article["listen_count"] = listen_counts.get(article["id"], 0)
+
 @main.route("/processed_articles", methods=["GET"])
 def processed_articles():
     try:
-        page = request.args.get("page", 1, type=int)
+        page_token = request.args.get("page_token")
         per_page = 10
         sort_by = request.args.get("sort_by", "processed_date")
         order = request.args.get("order", "desc")
+        if sort_by not in SORTABLE_FIELDS:
+            sort_by = "processed_date"
+        if order not in ("asc", "desc"):
+            order = "desc"
 
-        all_articles = get_all_articles()
-        reverse = order == "desc"
-        sorted_articles = sorted(
-            all_articles,
-            key=lambda x: x.get(sort_by, ""),
-            reverse=reverse,
-        )
-
-        total_articles = len(sorted_articles)
-        total_pages = (total_articles + per_page - 1) // per_page
-        start = (page - 1) * per_page
-        paginated_articles = sorted_articles[start:start + per_page]
+        page = get_articles_listing(sort_by=sort_by, order=order, page_size=per_page, page_token=page_token)
+        _attach_listen_counts(page["articles"])
 
         return render_template(
             "processed_articles.html",
-            articles=paginated_articles,
-            page=page,
-            total_pages=total_pages,
+            articles=page["articles"],
+            next_page_token=page["next_page_token"],
+            prev_page_token=page["prev_page_token"],
             sort_by=sort_by,
             order=order,
+            hashtag=None,
         )
     except Exception as e:
         logging.error(f"Error loading processed articles: {e}")
@@ -92,20 +105,38 @@ def search_by_hashtag():
         flash("No hashtag provided.")
         return redirect(url_for("main.processed_articles"))
     try:
-        articles = get_articles_by_hashtag(hashtag)
+        page = get_articles_listing(page_token=request.args.get("page_token"), hashtag=hashtag)
+        _attach_listen_counts(page["articles"])
         return render_template(
             "processed_articles.html",
-            articles=articles,
-            page=1,
-            total_pages=1,
+            articles=page["articles"],
+            next_page_token=page["next_page_token"],
+            prev_page_token=page["prev_page_token"],
             sort_by=None,
             order=None,
+            hashtag=hashtag,
         )
     except Exception as e:
         logging.error(f"Error searching by hashtag #{hashtag}: {e}")
         flash("An error occurred while searching.")
         return redirect(url_for("main.processed_articles"))
 
+@main.route("/search", methods=["GET"])
+def search():
+    query = request.args.get("q", "").strip()
+    page = request.args.get("page", 1, type=int)
+    try:
+        found = get_search_index().search(query, page=page) if query else {"results": [], "total": 0, "page": 1, "total_pages": 0}
+        for result in found["results"]:
+            result["snippet_html"] = Markup(
+                str(escape(result["snippet"] or "")).replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
+            )
+        return render_template("search.html", query=query, **found)
+    except Exception as e:
+        logging.error(f"Error searching for '{query}': {e}")
+        flash("An error occurred while searching.")
+        return redirect(url_for("main.processed_articles"))
+
 @main.route("/update_article/<string:article_id>", methods=["POST"])
 def update_article_tags(article_id):
     new_hashtags = request.form.get("hashtags", "").split(",")
@@ -127,39 +158,122 @@ def process_article():
         url = request.form.get("url", "").strip()
         hashtags = request.form.get("hashtags", "").strip().split(",")
         voice_name = request.form.get("voice_name", "").strip()
+        hashtags = [tag.strip() for tag in hashtags if tag.strip()]
 
-        article_data = extract_text_from_url(url)
-        if not article_data.get("text"):
-            return jsonify({"message": "Failed to extract text from article."}), 400
+        if not validate_url(url):
+            return jsonify({"message": "Please provide a valid article URL."}), 400
 
-        output_file = generate_audio_file_path(article_data, "downloads")
-        audio_length = text_to_speech(
-            article_data["text"],
-            output_file,
-            metadata=article_data,
-            voice_name=voice_name if voice_name else None,
-        )
-        download_link = upload_to_gcs(output_file, output_file.split("/")[-1])
-
-        save_article_metadata(
-            title=article_data["title"],
-            source=article_data["source"],
-            url=url,
-            publish_date=article_data["publish_date"],
-            download_link=download_link,
-            authors=article_data["authors"],
-            text_content=article_data["text"],
-            hashtags=[tag.strip() for tag in hashtags if tag.strip()],
-            voice_name=voice_name,
-            audio_length=round(audio_length, 2),
-        )
+        if Config.PROCESSING_MODE == "queue":
+            job_id = get_job_queue().enqueue(
+                "process_article",
+                {"url": url, "hashtags": hashtags, "voice_name": voice_name or None},
+            )
+            return jsonify({
+                "message": "Queued",
+                "job_id": job_id,
+                "status_url": url_for("main.job_status", job_id=job_id),
+            }), 202
 
+        download_link = run_article_pipeline(
+            url,
+            hashtags=hashtags,
+            voice_name=voice_name or None,
+            lease_wait_seconds=Config.SINGLE_FLIGHT_REQUEST_WAIT_SECONDS,
+        )
         return jsonify({
             "message": "Success",
             "audio_url": download_link,
             "details_url": url_for("main.processed_articles")
         }), 200
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except ArticleInProgressError as e:
+        return jsonify({"message": str(e)}), 409
     except Exception as e:
         logging.error(f"Error processing article: {e}", exc_info=True)
         return jsonify({"message": "Unexpected error during article processing."}), 500
+
+@main.route("/metrics/listen_buffer", methods=["GET"])
+def listen_buffer_metrics():
+    """Pending, flushed and dropped listen events in this process's buffer."""
+    return jsonify(get_listen_buffer().stats())
+
+@main.route("/jobs/<string:job_id>", methods=["GET"])
+def job_status(job_id):
+    try:
+        job = get_job_queue().get(job_id)
+        if not job:
+            return jsonify({"message": "Job not found."}), 404
+
+        response = {
+            "job_id": job["id"],
+            "status": job["status"],
+            "stage": job["stage"],
+            "progress": job["progress"],
+            "attempts": job["attempts"],
+        }
+        if job["status"] == "succeeded":
+            response["audio_url"] = (job["result"] or {}).get("audio_url")
+            response["details_url"] = url_for("main.processed_articles")
+        elif job["error"]:
+            response["error"] = job["error"]
+        return jsonify(response), 200
+    except Exception as e:
+        logging.error(f"Error loading job {job_id}: {e}")
+        return jsonify({"message": "An error occurred while loading the job status."}), 500
+
+@main.route("/stream_article", methods=["POST"])
+def stream_article():
+    """Starts synthesizing an article for streamed playback; returns the URL the audio is served from."""
+    if not Config.STREAM_PLAYBACK_ENABLED:
+        return jsonify({"message": "Streamed playback is not enabled."}), 404
+    url = request.form.get("url", "").strip()
+    hashtags = request.form.get("hashtags", "").strip().split(",")
+    voice_name = request.form.get("voice_name", "").strip()
+    if not validate_url(url):
+        return jsonify({"message": "Please provide a valid article URL."}), 400
+    try:
+        existing_article = get_article_by_url(url)
+        if existing_article:
+            return jsonify({
+                "message": "Success",
+                "audio_url": existing_article["download_link"],
+                "details_url": url_for("main.processed_articles"),
+            }), 200
+
+        stream_id = start_article_stream(
+            url,
+            hashtags=[tag.strip() for tag in hashtags if tag.strip()],
+            voice_name=voice_name if voice_name else None,
+        )
+        return jsonify({
+            "message": "Streaming",
+            "stream_id": stream_id,
+            "audio_url": url_for("main.stream_audio", stream_id=stream_id),
+            "details_url": url_for("main.processed_articles"),
+        }), 202
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    except ArticleInProgressError as e:
+        return jsonify({"message": str(e)}), 409
+    except Exception as e:
+        logging.error(f"Error streaming article: {e}", exc_info=True)
+        return jsonify({"message": "Unexpected error during article streaming."}), 500
+
+@main.route("/stream_article/<string:stream_id>", methods=["GET"])
+def stream_audio(stream_id):
+    """Serves the MP3 of a started stream from the beginning; media retries and seeks never start a render."""
+    if not Config.STREAM_PLAYBACK_ENABLED:
+        return jsonify({"message": "Streamed playback is not enabled."}), 404
+    stream = get_audio_streams().get(stream_id)
+    if stream is None:
+        # Streams are held by the process that started them (see STREAM_PLAYBACK_ENABLED).
+        return jsonify({"message": "Stream not found or expired."}), 404
+    if stream.download_link:
+        return redirect(stream.download_link)
+    return Response(
+        stream.iter_audio(),
+        mimetype="audio/mpeg",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no", "Accept-Ranges": "none"},
+    )
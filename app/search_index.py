@@ -0,0 +1,148 @@
+import logging
+import re
+import sqlite3
+import threading
+from typing import Optional
+from config import Config
+from db_setup import initialize_database
+from app.gcp_clients import get_firestore_client
+
+# bm25 weights for the articles_fts columns in table order; the unindexed columns get 0.
+_BM25_WEIGHTS = (0.0, 0.0, 0.0, 10.0, 5.0, 1.0)
+# Marks the matched terms in snippets; swapped for HTML only after the snippet is escaped.
+SNIPPET_START, SNIPPET_END = "\x02", "\x03"
+
+def build_match_query(query: str) -> str:
+    """Turns free text into an FTS5 query that matches every word, so user input can't be a syntax error."""
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+class SearchIndex:
+    """Full-text index (SQLite FTS5) over article titles, authors and text, ranked with bm25."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        initialize_database(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _remove(self, conn: sqlite3.Connection, article_id: str) -> None:
+        row = conn.execute("SELECT doc_id FROM search_documents WHERE article_id = ?", (article_id,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (row["doc_id"],))
+            conn.execute("DELETE FROM search_documents WHERE doc_id = ?", (row["doc_id"],))
+
+    def index_article(self, article_id: str, article: dict) -> None:
+        """Adds or replaces one article in the index."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            self._remove(conn, article_id)
+            doc_id = conn.execute("INSERT INTO search_documents (article_id) VALUES (?)", (article_id,)).lastrowid
+            conn.execute(
+                """INSERT INTO articles_fts (rowid, url, source, processed_date, title, authors, text_content)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    doc_id,
+                    article.get("url"),
+                    article.get("source"),
+                    article.get("processed_date"),
+                    article.get("title") or "",
+                    article.get("authors") or "",
+                    article.get("text_content") or "",
+                ),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def remove_article(self, article_id: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            self._remove(conn, article_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def indexed_article_ids(self) -> set:
+        conn = self._connect()
+        try:
+            return {row["article_id"] for row in conn.execute("SELECT article_id FROM search_documents")}
+        finally:
+            conn.close()
+
+    def search(self, query: str, page: int = 1, per_page: int = 10) -> dict:
+        """Returns one page of matches, best first: {"results", "total", "page", "total_pages"}.
+
+        Each result has id, url, source, processed_date, title, authors and a text snippet
+        with matched terms wrapped in SNIPPET_START/SNIPPET_END.
+        """
+        match = build_match_query(query)
+        if not match:
+            return {"results": [], "total": 0, "page": 1, "total_pages": 0}
+        page = max(page, 1)
+        conn = self._connect()
+        try:
+            total = conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH ?", (match,)).fetchone()[0]
+            rows = conn.execute(
+                f"""SELECT d.article_id, articles_fts.url, articles_fts.source, articles_fts.processed_date,
+                           articles_fts.title, articles_fts.authors,
+                           snippet(articles_fts, 5, ?, ?, '…', 24) AS snippet,
+                           bm25(articles_fts, {', '.join(str(w) for w in _BM25_WEIGHTS)}) AS rank
+                    FROM articles_fts JOIN search_documents d ON d.doc_id = articles_fts.rowid
+                    WHERE articles_fts MATCH ?
+                    ORDER BY rank LIMIT ? OFFSET ?""",
+                (SNIPPET_START, SNIPPET_END, match, per_page, (page - 1) * per_page),
+            ).fetchall()
+        finally:
+            conn.close()
+        results = [{**dict(row), "id": row["article_id"]} for row in rows]
+        return {"results": results, "total": total, "page": page, "total_pages": (total + per_page - 1) // per_page}
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def rebuild_from_firestore() -> int:
+    """Re-indexes every article in Firestore and drops deleted ones; returns how many were indexed."""
+    index = get_search_index()
+    fields = ["url", "source", "processed_date", "title", "authors", "text_content"]
+    indexed, seen_ids = 0, set()
+    for doc in get_firestore_client().collection("articles").select(fields).stream():
+        index.index_article(doc.id, doc.to_dict())
+        seen_ids.add(doc.id)
+        indexed += 1
+    for article_id in index.indexed_article_ids() - seen_ids:
+        index.remove_article(article_id)
+    logging.info(f"Indexed {indexed} articles for search.")
+    return indexed
+
+def get_search_index() -> SearchIndex:
+    """Returns the process-wide search index stored in SQLITE_DB_PATH."""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(Config.SQLITE_DB_PATH)
+        return _search_index
+
+def apply_local_write(article_id: str, data: Optional[dict] = None) -> None:
+    """Indexes an article saved by this app (data=None removes it); failures are logged, not raised."""
+    if not Config.SEARCH_INDEX_ENABLED:
+        return
+    try:
+        if data is None:
+            get_search_index().remove_article(article_id)
+        else:
+            get_search_index().index_article(article_id, data)
+    except Exception as e:
+        logging.error(f"Could not update the search index for article {article_id}: {e}")
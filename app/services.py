@@ -1,31 +1,55 @@
 import logging
 import traceback
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional, Tuple
 from urllib.parse import urlparse
 from flask import render_template, request, redirect, url_for, flash
+from config import Config
 from app.firestore_database_operations import (
-    get_all_articles,
+    get_articles_page,
+    get_listen_counts,
+    get_recent_articles,
     save_article_metadata,
     get_article_by_url,
 )
-from app.firestore_utils import log_listen_event
-from .text_extraction import extract_text_from_url
-from .text_to_speech_service import text_to_speech
-from .cloud_storage import upload_to_gcs
+from .extraction_cache import extract_article, get_extraction_cache
 from .file_management import (
+    cleanup_downloads,
+    generate_audio_file_name,
     generate_audio_file_path,
     create_directory_if_not_exists,
     extract_metadata,
+    normalize_url,
 )
+from .article_replica import get_article_replica, replica_reads_enabled
+from .audio_streams import get_audio_streams
+from .single_flight import LeaseRenewer, SingleFlight, get_lease_backend, new_lease_owner
 
-def get_paginated_articles(page: int = 1, per_page: int = 10):
+def get_articles_listing(sort_by: str = "processed_date", order: str = "desc", page_size: int = 10,
+                         page_token: Optional[str] = None, hashtag: Optional[str] = None) -> dict:
+    """Returns one page of articles from the SQLite replica when enabled and synced, else from Firestore."""
+    if replica_reads_enabled():
+        return get_article_replica().get_articles_page(sort_by, order, page_size, page_token, hashtag)
+    return get_articles_page(sort_by=sort_by, order=order, page_size=page_size, page_token=page_token, hashtag=hashtag)
+
+def get_recent_listing(limit: int = 5) -> list:
+    """Returns the most recently processed articles from the replica when enabled, else from Firestore."""
+    if replica_reads_enabled():
+        return get_article_replica().get_recent_articles(limit)
+    return get_recent_articles(limit=limit)
+
+def get_paginated_articles(page_token: Optional[str] = None, per_page: int = 10,
+                           sort_by: str = "processed_date", order: str = "desc"):
     try:
-        all_articles = get_all_articles()
-        total_articles = len(all_articles)
-        total_pages = (total_articles + per_page - 1) // per_page
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_articles = all_articles[start:end]
+        page = get_articles_listing(sort_by=sort_by, order=order, page_size=per_page, page_token=page_token)
+        paginated_articles = page["articles"]
+        listen_counts = get_listen_counts(paginated_articles)
 
         articles_with_listens = [
             {
@@ -40,86 +64,385 @@ def get_paginated_articles(page: int = 1, per_page: int = 10):
                 "hashtags": article.get("hashtags", []),
                 "voice_name": article.get("voice_name", "Default"),
                 "audio_length": article.get("audio_length"),
-                "listen_count": log_listen_event(article.get("id", ""), count_only=True) if article.get("id") else 0,
+                "listen_count": listen_counts.get(article["id"], 0),
             }
             for article in paginated_articles
         ]
 
         return {
             "articles": articles_with_listens,
-            "page": page,
-            "total_pages": total_pages,
+            "next_page_token": page["next_page_token"],
+            "prev_page_token": page["prev_page_token"],
         }
     except Exception as e:
         logging.error(f"Error loading processed articles: {e}")
         return None
 
-def process_article(url: str, hashtags: list = None, voice_name: str = None) -> str:
-    try:
-        logging.info(f"Processing article for URL: {url}")
+class ArticleInProgressError(Exception):
+    """Raised when another worker holds the processing lease for a URL and the caller cannot wait."""
+    pass
 
-        if not validate_url(url):
-            raise ValueError(f"Invalid URL: {url}")
+# Coalesces concurrent submissions of the same normalized URL within this process.
+_inflight_articles = SingleFlight()
+
+def _process_once(url: str, work: Callable[[], str], lease_wait_seconds: Optional[float] = None) -> str:
+    """Runs `work` for a URL at most once across concurrent callers and returns the shared download link.
+
+    Callers in this process attach to the in-flight call. Callers in other processes
+    wait up to `lease_wait_seconds` (default: SINGLE_FLIGHT_LEASE_SECONDS) for the
+    cross-process lease to be released and then reuse the saved article.
+    """
+    key = normalize_url(url)
+    if lease_wait_seconds is None:
+        lease_wait_seconds = Config.SINGLE_FLIGHT_LEASE_SECONDS
+    return _inflight_articles.do(key, lambda: _run_with_lease(key, url, work, lease_wait_seconds))
 
+def _run_with_lease(key: str, url: str, work: Callable[[], str], lease_wait_seconds: float) -> str:
+    lease_backend = get_lease_backend()
+    owner = new_lease_owner()
+    deadline = time.monotonic() + lease_wait_seconds
+    while lease_backend and not lease_backend.acquire(key, owner, Config.SINGLE_FLIGHT_LEASE_SECONDS):
+        existing_article = get_article_by_url(url)
+        if existing_article:
+            return existing_article["download_link"]
+        if time.monotonic() >= deadline:
+            logging.info(f"{url} is being processed by another worker; not waiting any longer.")
+            raise ArticleInProgressError("This article is already being generated. Please try again shortly.")
+        logging.info(f"{url} is being processed by another worker; waiting for its result.")
+        time.sleep(Config.SINGLE_FLIGHT_POLL_INTERVAL)
+    try:
         existing_article = get_article_by_url(url)
         if existing_article:
             logging.info(f"Article already processed: {url}")
             return existing_article["download_link"]
+        with LeaseRenewer(lease_backend, key, owner, Config.SINGLE_FLIGHT_LEASE_SECONDS):
+            return work()
+    finally:
+        if lease_backend:
+            lease_backend.release(key, owner)
 
-        article_data = extract_text_from_url(url)
-        if not article_data.get("text"):
-            raise ValueError("No text content found at the provided URL.")
+def process_article(url: str, hashtags: list = None, voice_name: str = None,
+                    progress_callback: Optional[Callable[[str, float], None]] = None,
+                    lease_wait_seconds: Optional[float] = None) -> str:
+    """Runs the full pipeline for one URL and returns the audio download link.
 
-        downloads_directory = "downloads"
-        create_directory_if_not_exists(downloads_directory)
-        audio_file_path = generate_audio_file_path(article_data, downloads_directory)
+    Concurrent submissions of the same (normalized) URL are coalesced, so only one
+    pipeline runs and later callers receive its result. A caller that finds the URL
+    leased by another process waits up to `lease_wait_seconds` (default: the whole
+    lease, for queue workers) and then raises ArticleInProgressError. `progress_callback`,
+    if given, receives (stage, fraction complete) as work proceeds.
+    """
+    report_progress = progress_callback or (lambda stage, progress: None)
+    try:
+        logging.info(f"Processing article for URL: {url}")
+
+        if not validate_url(url):
+            raise ValueError(f"Invalid URL: {url}")
+
+        def work() -> str:
+            report_progress("extracting", 0.05)
+            article_data = extract_article(url)
+            if not article_data.get("text"):
+                raise ValueError("No text content found at the provided URL.")
+
+            return _render_article(url, article_data, hashtags=hashtags, voice_name=voice_name,
+                                   progress_callback=report_progress)
+
+        return _process_once(url, work, lease_wait_seconds)
+    except Exception as e:
+        logging.error(f"Error processing article: {e}")
+        logging.error(traceback.format_exc())
+        raise
+
+def sweep_downloads() -> int:
+    """Applies the DOWNLOADS_MAX_AGE_HOURS / DOWNLOADS_MAX_MB retention policy to DOWNLOADS_DIR."""
+    return cleanup_downloads(
+        Config.DOWNLOADS_DIR,
+        max_age_seconds=Config.DOWNLOADS_MAX_AGE_HOURS * 3600,
+        max_bytes=Config.DOWNLOADS_MAX_MB * 1024 * 1024,
+    )
+
+def _render_article(url: str, article_data: dict, hashtags: list = None, voice_name: str = None,
+                    on_audio: Optional[Callable[[bytes], None]] = None,
+                    progress_callback: Optional[Callable[[str, float], None]] = None) -> str:
+    """Synthesizes, uploads and records an already extracted article; returns its download link."""
+    # Imported on first use: TTS (nltk, pydub) and Cloud Storage slow down web cold starts (see app/warmup.py).
+    from .text_to_speech_service import text_to_speech
+    from .cloud_storage import gcs_upload_stream, unique_blob_name, upload_file_object, upload_to_gcs
 
+    report_progress = progress_callback or (lambda stage, progress: None)
+
+    def synthesize(output) -> float:
         logging.info("Converting text to audio.")
-        audio_length = text_to_speech(
+        report_progress("synthesizing", 0.1)
+        return text_to_speech(
             article_data["text"],
-            audio_file_path,
+            output,
             metadata=article_data,
-            voice_name=voice_name
+            voice_name=voice_name,
+            on_audio=on_audio,
+            progress_callback=lambda done, total: report_progress("synthesizing", 0.1 + 0.75 * done / total)
         )
 
+    if Config.UPLOAD_MODE == "stream":
+        filename = unique_blob_name(generate_audio_file_name(article_data, Config.DOWNLOADS_DIR))
+        with gcs_upload_stream(filename) as upload_stream:
+            audio_length = synthesize(upload_stream)
+            report_progress("uploading", 0.9)
+        download_link = upload_stream.url
+    elif Config.UPLOAD_MODE == "buffer":
+        filename = unique_blob_name(generate_audio_file_name(article_data, Config.DOWNLOADS_DIR))
+        with tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_MAX_MB * 1024 * 1024) as audio_buffer:
+            audio_length = synthesize(audio_buffer)
+            report_progress("uploading", 0.9)
+            download_link = upload_file_object(audio_buffer, filename)
+    else:
+        downloads_directory = Config.DOWNLOADS_DIR
+        create_directory_if_not_exists(downloads_directory)
+        audio_file_path = generate_audio_file_path(article_data, downloads_directory)
+        audio_length = synthesize(audio_file_path)
+
         logging.info(f"Uploading {audio_file_path} to Google Cloud Storage.")
+        report_progress("uploading", 0.9)
         download_link = upload_to_gcs(audio_file_path, os.path.basename(audio_file_path))
+        if not Config.DOWNLOADS_KEEP_LOCAL:
+            os.remove(audio_file_path)
+        sweep_downloads()
 
-        logging.info("Saving metadata to Firestore.")
-        metadata = extract_metadata(article_data)
-        save_article_metadata(
-            title=metadata["title"],
-            source=metadata["source"],
-            url=url,
-            publish_date=metadata["publish_date"],
-            download_link=download_link,
-            authors=metadata["authors"],
-            text_content=article_data["text"],
-            hashtags=hashtags or [],
-            voice_name=voice_name,
-            audio_length=round(audio_length, 2)
-        )
+    logging.info("Saving metadata to Firestore.")
+    report_progress("saving", 0.95)
+    metadata = extract_metadata(article_data)
+    save_article_metadata(
+        title=metadata["title"],
+        source=metadata["source"],
+        url=url,
+        publish_date=metadata["publish_date"],
+        download_link=download_link,
+        authors=metadata["authors"],
+        text_content=article_data["text"],
+        hashtags=hashtags or [],
+        voice_name=voice_name,
+        audio_length=round(audio_length, 2)
+    )
 
-        return download_link
-    except Exception as e:
-        logging.error(f"Error processing article: {e}")
-        logging.error(traceback.format_exc())
+    return download_link
+
+def start_article_stream(url: str, hashtags: list = None, voice_name: str = None) -> str:
+    """Extracts an article, then starts synthesizing it in the background; returns the stream id.
+
+    The audio is served while it is produced by GET /stream_article/<id> (app/audio_streams.py),
+    which never starts a render itself. Upload and the Firestore save run on the same background
+    thread, so the final file is stored whether or not anyone listens; the lease on the URL is
+    renewed until then. If the article is already saved, the stream just redirects to it.
+    Raises ValueError before any audio is produced if the URL or its text is unusable,
+    and ArticleInProgressError if another worker is already processing the URL.
+    """
+    logging.info(f"Streaming article for URL: {url}")
+    if not validate_url(url):
+        raise ValueError(f"Invalid URL: {url}")
+
+    key = normalize_url(url)
+    lease_backend = get_lease_backend()
+    owner = new_lease_owner()
+    if lease_backend and not lease_backend.acquire(key, owner, Config.SINGLE_FLIGHT_LEASE_SECONDS):
+        raise ArticleInProgressError("This article is already being generated. Please try again shortly.")
+
+    def release_lease() -> None:
+        if lease_backend:
+            lease_backend.release(key, owner)
+
+    try:
+        # Another worker may have saved the article between the caller's check and the acquire.
+        existing_article = get_article_by_url(url)
+        if not existing_article:
+            article_data = extract_article(url)
+            if not article_data.get("text"):
+                raise ValueError("No text content found at the provided URL.")
+    except Exception:
+        release_lease()
         raise
 
-def process_multiple_articles(urls: list, hashtags: list = None, voice_name: str = None) -> list:
-    results = []
-    for url in urls:
-        if not validate_url(url):
-            logging.warning(f"Invalid URL skipped: {url}")
-            results.append({"url": url, "status": "Failed", "error": "Invalid URL"})
-            continue
+    stream = get_audio_streams().create(url)
+    if existing_article:
+        logging.info(f"Article already processed: {url}")
+        release_lease()
+        stream.finish(existing_article["download_link"])
+        return stream.id
 
+    def render():
+        download_link = None
         try:
-            download_link = process_article(url, hashtags=hashtags, voice_name=voice_name)
-            results.append({"url": url, "status": "Success", "download_link": download_link})
+            with LeaseRenewer(lease_backend, key, owner, Config.SINGLE_FLIGHT_LEASE_SECONDS):
+                download_link = _render_article(url, article_data, hashtags=hashtags, voice_name=voice_name,
+                                                on_audio=stream.append)
         except Exception as e:
-            logging.error(f"Failed to process {url}: {e}")
-            results.append({"url": url, "status": "Failed", "error": str(e)})
+            logging.error(f"Error rendering streamed article {url}: {e}")
+            logging.error(traceback.format_exc())
+        finally:
+            release_lease()
+            stream.finish(download_link)
+
+    threading.Thread(target=render, name="stream-render", daemon=True).start()
+    return stream.id
+
+class DomainThrottle:
+    """Per-domain politeness limits: caps concurrent fetches per host and spaces out their start times."""
+
+    def __init__(self, max_concurrent: int = 2, min_interval: float = 1.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        domain = urlparse(normalize_url(url)).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(domain, threading.BoundedSemaphore(self.max_concurrent))
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_start.get(domain, now))
+                self._next_start[domain] = start_at + self.min_interval
+            if start_at > now:
+                time.sleep(start_at - now)
+            yield
+
+def _precheck_for_batch(url: str) -> Optional[dict]:
+    """Batch checks before fetching: a result for invalid, already processed or recently extracted URLs, else None."""
+    if not validate_url(url):
+        return {"status": "Failed", "error": "Invalid URL"}
+    existing_article = get_article_by_url(url)
+    if existing_article:
+        logging.info(f"Article already processed: {url}")
+        return {"status": "Success", "download_link": existing_article["download_link"]}
+    if Config.EXTRACTION_CACHE_ENABLED:
+        cached = get_extraction_cache().get(url)
+        if cached is not None:
+            return {"status": "Extracted", "article_data": cached}
+    return None
+
+def _fetch_for_batch(url: str, throttle: DomainThrottle) -> dict:
+    """Batch stage 1 (I/O pool): existing-article check and politely throttled extraction."""
+    started = time.monotonic()
+    result = {"url": url, "timings": {}, "started": started}
+    try:
+        if not validate_url(url):
+            raise ValueError("Invalid URL")
+
+        existing_article = get_article_by_url(url)
+        if existing_article:
+            logging.info(f"Article already processed: {url}")
+            result.update(status="Success", download_link=existing_article["download_link"])
+            return result
+
+        with throttle.slot(url):
+            extract_started = time.monotonic()
+            article_data = extract_article(url)
+            result["timings"]["extract"] = round(time.monotonic() - extract_started, 3)
+        if not article_data.get("text"):
+            raise ValueError("No text content found at the provided URL.")
+        result.update(status="Extracted", article_data=article_data)
+    except Exception as e:
+        logging.error(f"Failed to extract {url}: {e}")
+        result.update(status="Failed", error=str(e))
+    finally:
+        result["timings"]["total"] = round(time.monotonic() - started, 3)
+    return result
+
+def _iter_fetched_threads(urls: Iterable[str], fetch_workers: int) -> Iterator[Tuple[int, dict]]:
+    throttle = DomainThrottle(Config.BATCH_DOMAIN_CONCURRENCY, Config.BATCH_DOMAIN_INTERVAL)
+    with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="batch-fetch") as fetch_pool:
+        fetch_futures = {fetch_pool.submit(_fetch_for_batch, url, throttle): i for i, url in enumerate(urls)}
+        for future in as_completed(fetch_futures):
+            yield fetch_futures[future], future.result()
+
+def _iter_fetched_async(urls: Iterable[str]) -> Iterator[Tuple[int, dict]]:
+    from .async_fetcher import iter_extracted_articles
+
+    for index, fetched in iter_extracted_articles(urls, precheck=_precheck_for_batch):
+        if fetched["status"] == "Extracted" and "fetch" in fetched["timings"] and Config.EXTRACTION_CACHE_ENABLED:
+            try:
+                get_extraction_cache().set(fetched["url"], fetched["article_data"])
+            except sqlite3.Error as e:
+                logging.error(f"Could not write the extraction cache for {fetched['url']}: {e}")
+        fetched["timings"]["total"] = round(time.monotonic() - fetched["started"], 3)
+        yield index, fetched
+
+def _render_for_batch(fetched: dict, hashtags: list = None, voice_name: str = None) -> dict:
+    """Batch stage 2 (TTS pool): synthesis, upload and metadata save for an extracted article."""
+    url = fetched["url"]
+    result = {"url": url, "timings": dict(fetched["timings"])}
+    render_started = time.monotonic()
+    try:
+        download_link = _process_once(
+            url, lambda: _render_article(url, fetched["article_data"], hashtags=hashtags, voice_name=voice_name)
+        )
+        result.update(status="Success", download_link=download_link)
+    except Exception as e:
+        logging.error(f"Failed to process {url}: {e}")
+        result.update(status="Failed", error=str(e))
+    finally:
+        finished = time.monotonic()
+        result["timings"]["render"] = round(finished - render_started, 3)
+        result["timings"]["total"] = round(finished - fetched["started"], 3)
+    return result
+
+def _iter_batch_results(urls: Iterable[str], hashtags: list = None, voice_name: str = None,
+                        fetch_workers: Optional[int] = None, tts_workers: Optional[int] = None) -> Iterator[Tuple[int, dict]]:
+    tts_workers = tts_workers or Config.BATCH_TTS_WORKERS
+    if Config.BATCH_FETCH_MODE == "async":
+        fetched_results = _iter_fetched_async(urls)
+    else:
+        fetched_results = _iter_fetched_threads(urls, fetch_workers or Config.BATCH_FETCH_WORKERS)
+
+    # Extracted articles (full text included) waiting for a TTS worker; past this, fetching pauses.
+    max_pending_renders = 2 * tts_workers
+    with ThreadPoolExecutor(max_workers=tts_workers, thread_name_prefix="batch-tts") as render_pool:
+        render_futures = {}
+        for index, fetched in fetched_results:
+            if fetched["status"] == "Extracted":
+                render_futures[render_pool.submit(_render_for_batch, fetched, hashtags, voice_name)] = index
+            else:
+                fetched.pop("started")
+                yield index, fetched
+            for future in [future for future in render_futures if future.done()]:
+                yield render_futures.pop(future), future.result()
+            while len(render_futures) >= max_pending_renders:
+                done, _ = wait(render_futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield render_futures.pop(future), future.result()
+        for future in as_completed(render_futures):
+            yield render_futures[future], future.result()
+
+def iter_processed_articles(urls: Iterable[str], hashtags: list = None, voice_name: str = None,
+                            fetch_workers: Optional[int] = None, tts_workers: Optional[int] = None) -> Iterator[dict]:
+    """Processes URLs as they arrive (any iterable, e.g. a feed reader), yielding each result as it finishes.
+
+    Results are the same as process_multiple_articles' but in completion order.
+    """
+    for _, result in _iter_batch_results(urls, hashtags, voice_name, fetch_workers, tts_workers):
+        yield result
+
+def process_multiple_articles(urls: list, hashtags: list = None, voice_name: str = None,
+                              fetch_workers: Optional[int] = None, tts_workers: Optional[int] = None) -> list:
+    """Processes a batch of URLs concurrently and returns one result per URL, in input order.
+
+    With BATCH_FETCH_MODE=async, pages are fetched by the asyncio fetcher (global and
+    per-host limits, robots.txt, backoff) and parsed on a process pool; with "threads",
+    fetching/extraction runs on an I/O pool of `fetch_workers` threads, throttled per
+    domain. Extracted articles are handed straight to a separate pool of `tts_workers`
+    that synthesizes, uploads and saves them. Failures are reported per URL without
+    stopping the batch, and every result carries timings in seconds: "extract",
+    "render" and "total" (wall time including any throttling or queueing).
+    """
+    results = [None] * len(urls)
+    for index, result in _iter_batch_results(urls, hashtags, voice_name, fetch_workers, tts_workers):
+        results[index] = result
+
+    succeeded = sum(1 for result in results if result["status"] == "Success")
+    logging.info(f"Batch processed {len(urls)} URLs: {succeeded} succeeded, {len(urls) - succeeded} failed.")
     return results
 
 def validate_url(url: str) -> bool:
@@ -136,7 +459,7 @@ def preview_article_metadata(url: str) -> dict:
         if not validate_url(url):
             raise ValueError(f"Invalid URL: {url}")
 
-        article_data = extract_text_from_url(url)
+        article_data = extract_article(url)
         if not article_data.get("text"):
             raise ValueError("No text content found at the provided URL.")
 
@@ -0,0 +1,213 @@
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, TypeVar
+from google.cloud import firestore
+from config import Config
+from db_setup import initialize_database
+from app.gcp_clients import get_firestore_client
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Per-process call coalescing: concurrent calls with the same key share one execution.
+
+    The first caller for a key runs the function; callers arriving while it runs
+    block and receive the same result (or exception) instead of running it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = Future()
+        if not is_leader:
+            logging.info(f"Attaching to in-flight work for {key}")
+            return call.result()
+
+        try:
+            result = fn()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+class LeaseBackend(ABC):
+    """Cross-process lease: at most one owner holds a key until it releases it or the lease expires."""
+
+    @abstractmethod
+    def acquire(self, key: str, owner: str, ttl_seconds: int) -> bool:
+        """Takes the lease on `key` for `ttl_seconds` unless another owner holds it; returns whether it did."""
+
+    @abstractmethod
+    def renew(self, key: str, owner: str, ttl_seconds: int) -> bool:
+        """Extends `owner`'s lease on `key` to `ttl_seconds` from now; returns False if it no longer holds it."""
+
+    @abstractmethod
+    def release(self, key: str, owner: str) -> None:
+        """Gives up the lease on `key` if `owner` still holds it."""
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """Leases stored in the local SQLite database; coordinates processes sharing the same volume."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        initialize_database(db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def acquire(self, key: str, owner: str, ttl_seconds: int) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT owner, expires_at FROM processing_leases WHERE key = ?", (key,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO processing_leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + ttl_seconds),
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew(self, key: str, owner: str, ttl_seconds: int) -> bool:
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE processing_leases SET expires_at = ? WHERE key = ? AND owner = ?",
+                (time.time() + ttl_seconds, key, owner),
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def release(self, key: str, owner: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM processing_leases WHERE key = ? AND owner = ?", (key, owner))
+        finally:
+            conn.close()
+
+class FirestoreLeaseBackend(LeaseBackend):
+    """Leases held in a Firestore collection via transactions; coordinates every instance."""
+
+    def __init__(self, collection: str = "processing_leases"):
+        self.collection = collection
+
+    def _doc_ref(self, key: str):
+        return get_firestore_client().collection(self.collection).document(hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def acquire(self, key: str, owner: str, ttl_seconds: int) -> bool:
+        doc_ref = self._doc_ref(key)
+
+        @firestore.transactional
+        def try_acquire(transaction) -> bool:
+            snapshot = doc_ref.get(transaction=transaction)
+            now = time.time()
+            if snapshot.exists:
+                lease = snapshot.to_dict()
+                if lease.get("owner") != owner and lease.get("expires_at", 0) > now:
+                    return False
+            transaction.set(doc_ref, {"key": key, "owner": owner, "expires_at": now + ttl_seconds})
+            return True
+
+        return try_acquire(get_firestore_client().transaction())
+
+    def renew(self, key: str, owner: str, ttl_seconds: int) -> bool:
+        doc_ref = self._doc_ref(key)
+
+        @firestore.transactional
+        def try_renew(transaction) -> bool:
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists or snapshot.to_dict().get("owner") != owner:
+                return False
+            transaction.update(doc_ref, {"expires_at": time.time() + ttl_seconds})
+            return True
+
+        return try_renew(get_firestore_client().transaction())
+
+    def release(self, key: str, owner: str) -> None:
+        doc_ref = self._doc_ref(key)
+
+        @firestore.transactional
+        def try_release(transaction) -> None:
+            snapshot = doc_ref.get(transaction=transaction)
+            if snapshot.exists and snapshot.to_dict().get("owner") == owner:
+                transaction.delete(doc_ref)
+
+        try_release(get_firestore_client().transaction())
+
+class LeaseRenewer:
+    """Keeps a held lease alive while long work runs, renewing it every third of `ttl_seconds`.
+
+    Used as a context manager around the work (a no-op without a backend); a lost lease is
+    logged but doesn't stop the work.
+    """
+
+    def __init__(self, backend: Optional[LeaseBackend], key: str, owner: str, ttl_seconds: int):
+        self.backend = backend
+        self.key = key
+        self.owner = owner
+        self.ttl_seconds = ttl_seconds
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(max(self.ttl_seconds / 3, 1)):
+            try:
+                if not self.backend.renew(self.key, self.owner, self.ttl_seconds):
+                    logging.warning(f"Lease on {self.key} was lost; another worker may start the same work.")
+                    return
+            except Exception as e:
+                logging.error(f"Could not renew the lease on {self.key}: {e}")
+
+    def __enter__(self) -> "LeaseRenewer":
+        if self.backend:
+            self._thread = threading.Thread(target=self._run, name="lease-renewer", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+
+_lease_backend = None
+_lease_backend_lock = threading.Lock()
+
+def get_lease_backend() -> Optional[LeaseBackend]:
+    """Returns the configured cross-process lease backend, or None when SINGLE_FLIGHT_BACKEND is "none"."""
+    global _lease_backend
+    with _lease_backend_lock:
+        if _lease_backend is None:
+            if Config.SINGLE_FLIGHT_BACKEND == "sqlite":
+                _lease_backend = SQLiteLeaseBackend(Config.SQLITE_DB_PATH)
+            elif Config.SINGLE_FLIGHT_BACKEND == "firestore":
+                _lease_backend = FirestoreLeaseBackend()
+        return _lease_backend
+
+def new_lease_owner() -> str:
+    """Returns a unique lease owner id for one unit of work in this process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
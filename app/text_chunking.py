@@ -0,0 +1,127 @@
+import logging
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+from config import Config
+
+# Optional: rule-based sentence segmenter
+try:
+    import pysbd
+    PYSBD_AVAILABLE = True
+except ImportError:
+    PYSBD_AVAILABLE = False
+
+# Sentence end: terminal punctuation, optional closing quotes/brackets, whitespace, then
+# something that can start a sentence.
+_SENTENCE_END = re.compile(r"([.!?…][\"'”’)\]]*)\s+(?=[\"'“‘(\[]?[A-Z0-9])")
+# Words whose trailing period rarely ends a sentence.
+_ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "inc", "ltd", "co", "corp",
+    "gen", "gov", "sen", "rep", "lt", "col", "sgt", "capt", "no", "vol", "fig", "jan", "feb", "mar",
+    "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "e.g", "i.e", "u.s", "u.k", "a.m", "p.m",
+}
+# Where an oversize sentence is split, tried in order: after clause punctuation, then between words.
+_BOUNDARIES = (re.compile(r"(?<=[,;:)\]—–])\s+"), re.compile(r"\s+"))
+# Set once punkt is found missing, so the regex segmenter is used without retrying the lookup.
+_punkt_missing = False
+
+def _is_abbreviation(text: str, end: int) -> bool:
+    # Only the last word matters; look at a short window so long texts aren't rescanned per match.
+    words = text[max(0, end - 16):end].split()
+    word = words[-1].rstrip(".").lower() if words else ""
+    return word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+def split_sentences_regex(text: str) -> List[str]:
+    """Fast punctuation-based sentence splitter that skips common abbreviations and initials."""
+    sentences, start = [], 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end(1)
+        if text[end - 1] == "." and _is_abbreviation(text, end):
+            continue
+        sentences.append(text[start:end])
+        start = match.end()
+    sentences.append(text[start:])
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+def split_sentences_punkt(text: str) -> List[str]:
+    global _punkt_missing
+    if _punkt_missing:
+        return split_sentences_regex(text)
+    import nltk
+    from nltk.tokenize import sent_tokenize
+
+    # The punkt model is baked into the image (see readme) instead of downloaded at runtime.
+    if Config.NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, Config.NLTK_DATA_DIR)
+    try:
+        return sent_tokenize(text)
+    except LookupError:
+        logging.warning(f"nltk punkt model not found (NLTK_DATA_DIR={Config.NLTK_DATA_DIR}); using the regex segmenter.")
+        _punkt_missing = True
+        return split_sentences_regex(text)
+
+def split_sentences_pysbd(text: str) -> List[str]:
+    if not PYSBD_AVAILABLE:
+        logging.warning("pysbd is not installed; using the regex segmenter.")
+        return split_sentences_regex(text)
+    return pysbd.Segmenter(language="en", clean=False).segment(text)
+
+SEGMENTERS: Dict[str, Callable[[str], List[str]]] = {
+    "punkt": split_sentences_punkt,
+    "regex": split_sentences_regex,
+    "pysbd": split_sentences_pysbd,
+}
+
+def _pack(parts: Iterable[str], max_bytes: int) -> List[str]:
+    """Joins parts (each at most max_bytes) with spaces into as few chunks of at most max_bytes as possible.
+
+    Byte lengths are counted once per part and kept as a running total.
+    """
+    chunks, current, current_bytes = [], [], 0
+    for part in parts:
+        part_bytes = len(part.encode("utf-8"))
+        if current and current_bytes + 1 + part_bytes > max_bytes:
+            chunks.append(" ".join(current))
+            current, current_bytes = [], 0
+        current_bytes += part_bytes + (1 if current else 0)
+        current.append(part)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def _hard_split(text: str, max_bytes: int) -> List[str]:
+    """Last resort for text without usable boundaries: cut between characters, never inside one."""
+    pieces, start, size = [], 0, 0
+    for index, char in enumerate(text):
+        char_bytes = len(char.encode("utf-8"))
+        if size + char_bytes > max_bytes:
+            pieces.append(text[start:index])
+            start, size = index, 0
+        size += char_bytes
+    pieces.append(text[start:])
+    return pieces
+
+def split_oversize(text: str, max_bytes: int, level: int = 0) -> List[str]:
+    """Splits text longer than max_bytes at clause boundaries, then word boundaries, then characters."""
+    if len(text.encode("utf-8")) <= max_bytes:
+        return [text]
+    if level >= len(_BOUNDARIES):
+        return _hard_split(text, max_bytes)
+    parts = []
+    for part in _BOUNDARIES[level].split(text):
+        if part:
+            parts.extend(split_oversize(part, max_bytes, level + 1))
+    return _pack(parts, max_bytes)
+
+def chunk_text(text: str, max_bytes: int = 5000, segmenter: Optional[str] = None) -> List[str]:
+    """Splits text into chunks of whole sentences, each at most max_bytes of UTF-8.
+
+    Sentences come from `segmenter` ("punkt", "regex" or "pysbd"; default TTS_SEGMENTER).
+    A sentence longer than max_bytes is split at clause or word boundaries.
+    """
+    segment = SEGMENTERS.get(segmenter or Config.TTS_SEGMENTER, split_sentences_regex)
+    parts = []
+    for sentence in segment(text):
+        sentence = sentence.strip()
+        if sentence:
+            parts.extend(split_oversize(sentence, max_bytes))
+    return _pack(parts, max_bytes)
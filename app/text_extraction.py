@@ -1,11 +1,12 @@
-import datetime
 import logging
 import time
-from newspaper import Article, Config
-from bs4 import BeautifulSoup
-from typing import Dict, Any
+from newspaper import Article, Config as NewspaperConfig
+from typing import Callable, Dict, Any, List, Optional
+import lxml.html
 import requests
-from requests.exceptions import HTTPError, RequestException
+from requests.exceptions import ConnectionError, HTTPError, RequestException, Timeout
+from config import Config
+from app.http_client import HEADERS, fetch_html
 
 # Optional: fallback parser
 try:
@@ -14,12 +15,10 @@ try:
 except ImportError:
     TRAFILATURA_AVAILABLE = False
 
-# Custom User-Agent header to avoid bot detection
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-    "Referer": "https://www.google.com/",
-    "Accept-Language": "en-US,en;q=0.9",
-}
+# Statuses worth another attempt; any other HTTP error (404, 403, 410...) won't change on retry.
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Elements whose text is never article body for the lxml paragraph extractor.
+_BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "figcaption"]
 
 def remove_repeated_paragraphs(text: str) -> str:
     seen = set()
@@ -31,13 +30,96 @@ def remove_repeated_paragraphs(text: str) -> str:
             seen.add(trimmed)
     return '\n\n'.join(cleaned)
 
-def extract_text_from_url(url: str, retries: int = 3, backoff_factor: int = 2) -> Dict[str, Any]:
-    """
-    Extracts article text, title, and author information from the provided URL.
-    Returns a dictionary containing the text and metadata.
-    Retries extraction with exponential backoff if it fails.
-    """
-    article_data = {
+def is_retryable_error(error: Exception) -> bool:
+    """Whether a fetch error is transient: timeouts, dropped connections, 429 and 5xx responses."""
+    if isinstance(error, HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUSES
+    return isinstance(error, (ConnectionError, Timeout))
+
+def _parse_trafilatura(url: str, html: str) -> Optional[Dict[str, Any]]:
+    if not TRAFILATURA_AVAILABLE:
+        return None
+    result = trafilatura.bare_extraction(html, url=url, include_comments=False, include_tables=False)
+    if not result or not result.get("text"):
+        return None
+    authors = [author.strip() for author in (result.get("author") or "").split(";") if author.strip()]
+    return {"title": result.get("title"), "text": result["text"], "authors": authors, "publish_date": result.get("date")}
+
+def _parse_newspaper(url: str, html: str) -> Optional[Dict[str, Any]]:
+    newspaper_config = NewspaperConfig()
+    newspaper_config.browser_user_agent = HEADERS['User-Agent']
+    newspaper_config.fetch_images = False  # Image sizing would download images during parse()
+
+    article = Article(url, config=newspaper_config)
+    article.download(input_html=html)
+    article.parse()
+    publish_date = article.publish_date.strftime("%Y-%m-%d") if article.publish_date else None
+    return {"title": article.title, "text": article.text, "authors": article.authors, "publish_date": publish_date}
+
+def _parse_lxml(url: str, html: str) -> Optional[Dict[str, Any]]:
+    """Paragraph extractor: the <p> text of the page once navigation, scripts and the like are dropped."""
+    tree = lxml.html.fromstring(html)
+    for element in tree.xpath("//" + " | //".join(_BOILERPLATE_TAGS)):
+        element.drop_tree()
+    paragraphs = [paragraph.text_content().strip() for paragraph in tree.iter("p")]
+    og_title = tree.xpath("//meta[@property='og:title']/@content")
+    title = og_title[0] if og_title else tree.findtext(".//title")
+    return {"title": title.strip() if title else None, "text": "\n".join(paragraphs), "authors": [], "publish_date": None}
+
+PARSERS: Dict[str, Callable[[str, str], Optional[Dict[str, Any]]]] = {
+    "trafilatura": _parse_trafilatura,
+    "newspaper": _parse_newspaper,
+    "lxml": _parse_lxml,
+}
+
+def parse_strategy(value: str) -> Dict[str, List[str]]:
+    """Parses "nytimes.com=trafilatura,lxml;example.org=lxml" into {domain: [parser, ...]}."""
+    strategies = {}
+    for entry in value.split(";"):
+        domain, _, parsers = entry.partition("=")
+        if domain.strip() and parsers.strip():
+            strategies[domain.strip().lower()] = [name.strip() for name in parsers.split(",") if name.strip() in PARSERS]
+    return strategies
+
+def parsers_for_url(url: str) -> List[str]:
+    """Parsers to try for a URL, in order: the EXTRACTION_DOMAIN_PARSERS entry for its domain
+    (or a parent domain), else EXTRACTION_PARSERS."""
+    domain = requests.utils.urlparse(url).netloc.lower().split(":")[0]
+    strategies = parse_strategy(Config.EXTRACTION_DOMAIN_PARSERS)
+    labels = domain.split(".")
+    for i in range(len(labels) - 1):
+        parsers = strategies.get(".".join(labels[i:]))
+        if parsers:
+            return parsers
+    return [name.strip() for name in Config.EXTRACTION_PARSERS.split(",") if name.strip() in PARSERS]
+
+def score_extraction(result: Dict[str, Any]) -> float:
+    """Rates an extraction: its word count, discounted when the text is mostly short lines
+    (menus, captions, share buttons), with a small bonus for a title and authors."""
+    paragraphs = [paragraph for paragraph in result.get("text", "").split("\n\n") if paragraph.strip()]
+    if not paragraphs:
+        return 0.0
+    words = sum(len(paragraph.split()) for paragraph in paragraphs)
+    long_share = sum(1 for paragraph in paragraphs if len(paragraph.split()) >= 20) / len(paragraphs)
+    bonus = (1.1 if result.get("title") else 1.0) * (1.05 if result.get("authors") else 1.0)
+    return words * (0.5 + long_share) * bonus
+
+def _fetch_with_retries(url: str, retries: int, backoff_factor: int) -> Optional[str]:
+    for attempt in range(retries):
+        try:
+            return fetch_html(url)
+        except RequestException as e:
+            if not is_retryable_error(e):
+                logging.error(f"Not retrying {url}: {e}")
+                return None
+            logging.warning(f"Retryable error on attempt {attempt + 1}/{retries} for {url}: {e}")
+        if attempt < retries - 1:
+            time.sleep(backoff_factor ** attempt)
+    logging.error(f"Could not download {url} after {retries} attempts.")
+    return None
+
+def _empty_article_data(url: str) -> Dict[str, Any]:
+    return {
         "title": "Unknown Title",
         "text": "",
         "authors": ["Unknown Author"],
@@ -45,75 +127,53 @@ def extract_text_from_url(url: str, retries: int = 3, backoff_factor: int = 2) -
         "source": url
     }
 
-    # Try enhanced handling for known problematic domains
-    domain = requests.utils.urlparse(url).netloc
-    use_trafilatura = ("nytimes.com" in domain) and TRAFILATURA_AVAILABLE
+def extract_from_html(url: str, html: str) -> Dict[str, Any]:
+    """Runs the parsers chosen by parsers_for_url over already downloaded HTML.
 
-    if use_trafilatura:
-        logging.info("Using trafilatura for URL: %s", url)
-        try:
-            downloaded = trafilatura.fetch_url(url)
-            if downloaded:
-                result = trafilatura.extract(downloaded, include_comments=False, include_tables=False)
-                if result:
-                    article_data["text"] = remove_repeated_paragraphs(result)
-                    article_data["title"] = url  # Trafilatura lacks title extraction
-                    return article_data
-        except Exception as e:
-            logging.warning(f"Trafilatura fallback failed for {url}: {e}")
-
-    # Retry loop for newspaper3k
-    for attempt in range(retries):
+    Parsing stops at the first result scoring EXTRACTION_GOOD_ENOUGH_SCORE; otherwise the
+    best-scoring result wins, with missing metadata filled in from the other parsers.
+    Picklable, so bulk imports can run it in a process pool.
+    """
+    article_data = _empty_article_data(url)
+    results = []
+    for name in parsers_for_url(url):
         try:
-            user_agent_config = Config()
-            user_agent_config.browser_user_agent = HEADERS['User-Agent']
-            user_agent_config.request_timeout = 15
-
-            article = Article(url, config=user_agent_config)
-            article.download()
-            article.parse()
-
-            article_data["title"] = article.title or article_data["title"]
-            article_data["text"] = remove_repeated_paragraphs(article.text or "")
-            article_data["authors"] = article.authors or article_data["authors"]
-            if article.publish_date:
-                article_data["publish_date"] = article.publish_date.strftime("%Y-%m-%d")
-
-            logging.info(f"Successfully extracted article data from URL: {url}")
-            return article_data
-
-        except HTTPError as http_err:
-            logging.warning(f"HTTP error on attempt {attempt + 1}/{retries} for {url}: {http_err}")
-        except RequestException as req_err:
-            logging.warning(f"Request error on attempt {attempt + 1}/{retries} for {url}: {req_err}")
+            result = PARSERS[name](url, html)
         except Exception as e:
-            logging.error(f"Unexpected error on attempt {attempt + 1}/{retries} for {url}: {e}")
-
-        time.sleep(backoff_factor ** attempt)
-
-    # Fallback using BeautifulSoup
-    try:
-        logging.info(f"Attempting fallback extraction using BeautifulSoup for URL: {url}")
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-        title_tag = soup.find('title')
-        if title_tag:
-            article_data["title"] = title_tag.text.strip()
-
-        paragraphs = soup.find_all('p')
-        if paragraphs:
-            raw_text = "\n".join(p.get_text().strip() for p in paragraphs)
-            article_data["text"] = remove_repeated_paragraphs(raw_text)
-
-        logging.info(f"Fallback extraction successful for URL: {url}")
+            logging.warning(f"{name} could not parse {url}: {e}")
+            continue
+        if not result:
+            continue
+        result["text"] = remove_repeated_paragraphs(result.get("text") or "")
+        score = score_extraction(result)
+        logging.info(f"{name} extraction of {url} scored {score:.0f}.")
+        results.append((score, name, result))
+        if score >= Config.EXTRACTION_GOOD_ENOUGH_SCORE:
+            break
+
+    if not results:
+        logging.error(f"No parser extracted text from {url}.")
+        return article_data
+
+    results.sort(key=lambda item: item[0], reverse=True)
+    score, name, best = results[0]
+    for field in ("title", "authors", "publish_date"):
+        value = best.get(field) or next((result[field] for _, _, result in results[1:] if result.get(field)), None)
+        if value:
+            article_data[field] = value
+    article_data["text"] = best["text"]
+    logging.info(f"Successfully extracted article data from URL: {url} (parser: {name})")
+    return article_data
 
-    except HTTPError as http_err:
-        logging.error(f"HTTP error during fallback extraction for {url}: {http_err}")
-    except RequestException as req_err:
-        logging.error(f"Request error during fallback extraction for {url}: {req_err}")
-    except Exception as e:
-        logging.error(f"Unexpected error during fallback extraction for {url}: {e}")
+def extract_text_from_url(url: str, retries: int = 3, backoff_factor: int = 2) -> Dict[str, Any]:
+    """
+    Extracts article text, title, and author information from the provided URL.
+    Returns a dictionary containing the text and metadata.
 
-    return article_data
+    The page is downloaded once (transient errors are retried with exponential backoff)
+    and handed to extract_from_html.
+    """
+    html = _fetch_with_retries(url, retries, backoff_factor)
+    if html is None:
+        return _empty_article_data(url)
+    return extract_from_html(url, html)
@@ -2,30 +2,29 @@ import logging
 import tempfile
 import os
 import time
+import threading
+import shutil
+from contextlib import closing, nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait
 from google.cloud import texttospeech
 from pydub import AudioSegment
-from typing import List, Dict, Optional
-import nltk
-from nltk.tokenize import sent_tokenize
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from config import Config
+from app.gcp_clients import get_tts_client
+from app.tts_cache import get_chunk_cache, make_chunk_cache_key
+from app.audio_processing import concatenate_mp3_chunks
+from app.text_chunking import chunk_text
 
 class TTSConversionError(Exception):
     """Custom exception for Text-to-Speech conversion errors."""
     pass
 
-nltk.download('punkt')
+# Caps concurrent synthesize_speech calls across every article handled by this process.
+_tts_in_flight = threading.BoundedSemaphore(max(1, Config.TTS_MAX_IN_FLIGHT))
 
 def split_text_by_bytes(text: str, max_bytes: int = 5000) -> List[str]:
-    """Splits text into chunks using nltk sentence tokenizer and byte limit."""
-    chunks, current_chunk = [], ""
-    for sentence in sent_tokenize(text):
-        sentence_bytes = len(sentence.encode('utf-8'))
-        if len(current_chunk.encode('utf-8')) + sentence_bytes <= max_bytes:
-            current_chunk += sentence + " "
-        else:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence + " "
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+    """Splits text into chunks of whole sentences within the byte limit (see app/text_chunking.py)."""
+    chunks = chunk_text(text, max_bytes)
     logging.info(f"Split text into {len(chunks)} chunks.")
     return chunks
 
@@ -44,18 +43,43 @@ def synthesize_text_chunk(
     voice: texttospeech.VoiceSelectionParams,
     audio_config: texttospeech.AudioConfig,
     use_ssml: bool = False,
-    retries: int = 3
+    retries: int = 3,
+    use_cache: bool = True
 ) -> str:
-    """Synthesizes a text chunk with retries, optionally using SSML."""
+    """Synthesizes a text chunk with retries, optionally using SSML.
+
+    Audio already produced for the same chunk text and voice/audio settings is
+    served from the chunk cache instead of calling the API again.
+    """
+    cache = get_chunk_cache() if use_cache else None
+    cache_key = make_chunk_cache_key(chunk, voice, audio_config, use_ssml) if cache else None
+    audio_content = cache.get(cache_key) if cache else None
+    if audio_content is not None:
+        logging.info(f"TTS chunk cache hit: {cache_key}")
+    else:
+        audio_content = _request_chunk_audio(chunk, client, voice, audio_config, use_ssml, retries)
+        if cache:
+            cache.put(cache_key, audio_content)
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
+    temp_file.write(audio_content)
+    temp_file.close()
+    return temp_file.name
+
+def _request_chunk_audio(
+    chunk: str,
+    client: texttospeech.TextToSpeechClient,
+    voice: texttospeech.VoiceSelectionParams,
+    audio_config: texttospeech.AudioConfig,
+    use_ssml: bool,
+    retries: int
+) -> bytes:
     for attempt in range(retries):
         try:
             input_data = texttospeech.SynthesisInput(ssml=f"<speak>{chunk}</speak>") if use_ssml else texttospeech.SynthesisInput(text=chunk)
-            response = client.synthesize_speech(input=input_data, voice=voice, audio_config=audio_config)
-
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-            temp_file.write(response.audio_content)
-            temp_file.close()
-            return temp_file.name
+            with _tts_in_flight:
+                response = client.synthesize_speech(input=input_data, voice=voice, audio_config=audio_config)
+            return response.audio_content
 
         except Exception as e:
             if attempt < retries - 1:
@@ -66,24 +90,139 @@ def synthesize_text_chunk(
                 logging.error(f"Final attempt failed for chunk: {e}")
                 raise TTSConversionError(f"Failed to synthesize chunk after {retries} attempts.")
 
+def iter_synthesized_chunks(
+    chunks: List[str],
+    client: texttospeech.TextToSpeechClient,
+    voice: texttospeech.VoiceSelectionParams,
+    audio_config: texttospeech.AudioConfig,
+    use_ssml: bool = False,
+    retries: int = 3,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Iterator[str]:
+    """Synthesizes chunks on a bounded thread pool, yielding each temp file in chunk order as soon as it is ready.
+
+    Each chunk keeps its own retry/backoff. Yielded files belong to the caller. If a
+    chunk fails or the caller stops early, pending chunks are cancelled and files not
+    yet handed over are removed. `progress_callback` receives (chunks done, total).
+    """
+    max_workers = max(1, min(max_workers or Config.TTS_MAX_WORKERS, len(chunks) or 1))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts") as executor:
+        futures = [
+            executor.submit(synthesize_text_chunk, chunk, client, voice, audio_config, use_ssml, retries)
+            for chunk in chunks
+        ]
+        handed_over = 0
+        try:
+            for i, future in enumerate(futures):
+                temp_file = future.result()
+                logging.info(f"Generated audio for chunk {i + 1}/{len(chunks)}")
+                if progress_callback:
+                    progress_callback(i + 1, len(chunks))
+                handed_over += 1
+                yield temp_file
+        finally:
+            pending = futures[handed_over:]
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            _remove_temp_files(
+                future.result() for future in pending
+                if not future.cancelled() and future.exception() is None
+            )
+
+def synthesize_chunks(
+    chunks: List[str],
+    client: texttospeech.TextToSpeechClient,
+    voice: texttospeech.VoiceSelectionParams,
+    audio_config: texttospeech.AudioConfig,
+    use_ssml: bool = False,
+    retries: int = 3,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> List[str]:
+    """Synthesizes all chunks concurrently and returns their temp files in chunk order."""
+    temp_files = []
+    try:
+        chunk_files = iter_synthesized_chunks(
+            chunks, client, voice, audio_config, use_ssml, retries, max_workers, progress_callback
+        )
+        for temp_file in chunk_files:
+            temp_files.append(temp_file)
+        return temp_files
+    except Exception:
+        _remove_temp_files(temp_files)
+        raise
+
+def _consume_temp_files(temp_files: Iterator[str]) -> Iterator[str]:
+    """Passes temp files through, deleting each one once the consumer moves past it."""
+    with closing(temp_files):
+        for temp_file in temp_files:
+            try:
+                yield temp_file
+            finally:
+                _remove_temp_files([temp_file])
+
+class _AudioTee:
+    """File-like wrapper that hands every block written to the output to a callback as well."""
+
+    def __init__(self, output: BinaryIO, on_audio: Callable[[bytes], None]):
+        self._output = output
+        self._on_audio = on_audio
+
+    def write(self, data) -> None:
+        self._output.write(data)
+        self._on_audio(bytes(data))
+
+def _remove_temp_files(temp_files) -> None:
+    for temp_file in temp_files:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+            logging.info(f"Deleted temporary file: {temp_file}")
+
 def text_to_speech(
     text: str,
-    output_file: str,
+    output_file: Union[str, BinaryIO],
     metadata: Dict[str, str],
     language_code: str = "en-US",
     gender: texttospeech.SsmlVoiceGender = texttospeech.SsmlVoiceGender.NEUTRAL,
     voice_name: Optional[str] = None,
     use_ssml: bool = False,
-    retries: int = 3
+    retries: int = 3,
+    max_workers: Optional[int] = None,
+    concat_mode: Optional[str] = None,
+    on_audio: Optional[Callable[[bytes], None]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
 ) -> float:
-    """Converts text to speech, normalizes volume, and returns audio length in seconds."""
-    client = texttospeech.TextToSpeechClient()
+    """Converts text to speech, normalizes volume, and returns audio length in seconds.
+
+    `output_file` is a path or a writable binary file object (such as an upload stream),
+    which is written to but not closed.
+
+    Chunks are synthesized concurrently on up to `max_workers` threads
+    (defaults to Config.TTS_MAX_WORKERS; 1 synthesizes them sequentially).
+
+    `concat_mode` (defaults to Config.TTS_CONCAT_MODE) picks how chunks are joined:
+    "stream" copies MP3 frames straight into the output file, relying on the TTS
+    volume gain/effects profile or an optional ffmpeg loudnorm pass for levels;
+    "pydub" decodes, peak-normalizes and re-encodes everything in memory.
+
+    In stream mode each chunk is appended as soon as it (and every chunk before it)
+    is synthesized, and `on_audio`, if given, receives the same MP3 bytes as they are
+    written so callers can forward them to a listener while synthesis continues.
+    `progress_callback` receives (chunks synthesized, total chunks).
+    """
+    client = get_tts_client()
     voice = texttospeech.VoiceSelectionParams(
         language_code=language_code,
         ssml_gender=gender,
         name=voice_name if voice_name else None
     )
-    audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+    audio_config = texttospeech.AudioConfig(
+        audio_encoding=texttospeech.AudioEncoding.MP3,
+        volume_gain_db=Config.TTS_VOLUME_GAIN_DB,
+        effects_profile_id=Config.TTS_EFFECTS_PROFILE_IDS,
+    )
 
     intro_text = format_metadata_text(metadata)
     full_text = f"{intro_text} {text}"
@@ -91,26 +230,52 @@ def text_to_speech(
     temp_files = []
 
     try:
-        for i, chunk in enumerate(text_chunks):
-            temp_file_path = synthesize_text_chunk(chunk, client, voice, audio_config, use_ssml, retries)
-            temp_files.append(temp_file_path)
-            logging.info(f"Generated audio for chunk {i + 1}/{len(text_chunks)}")
+        if (concat_mode or Config.TTS_CONCAT_MODE) == "pydub" and on_audio is None:
+            temp_files = synthesize_chunks(
+                text_chunks, client, voice, audio_config, use_ssml, retries, max_workers, progress_callback
+            )
+            return _concatenate_with_pydub(temp_files, output_file)
 
-        combined_audio = AudioSegment.empty()
-        for temp_file_path in temp_files:
-            combined_audio += AudioSegment.from_mp3(temp_file_path)
+        chunk_files = _consume_temp_files(
+            iter_synthesized_chunks(
+                text_chunks, client, voice, audio_config, use_ssml, retries, max_workers, progress_callback
+            )
+        )
+        output_context = open(output_file, "wb") if isinstance(output_file, str) else nullcontext(output_file)
+        with closing(chunk_files), output_context as output_handle:
+            output = _AudioTee(output_handle, on_audio) if on_audio else output_handle
+            audio_length = concatenate_mp3_chunks(chunk_files, output, normalize=Config.TTS_NORMALIZE == "loudnorm")
+        logging.info(f"Concatenated audio saved as: {_describe_output(output_file)}")
 
-        combined_audio = combined_audio.normalize()
-        combined_audio.export(output_file, format="mp3")
-        logging.info(f"Concatenated audio saved as: {output_file}")
-
-        return combined_audio.duration_seconds
+        return audio_length
 
     except TTSConversionError as e:
         logging.error(f"Error during text-to-speech conversion: {e}")
         raise
     finally:
-        for temp_file in temp_files:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-                logging.info(f"Deleted temporary file: {temp_file}")
+        _remove_temp_files(temp_files)
+
+def _describe_output(output_file: Union[str, BinaryIO]) -> str:
+    return output_file if isinstance(output_file, str) else "stream"
+
+def join_and_normalize(segments: Iterable[AudioSegment]) -> AudioSegment:
+    """Joins decoded chunks and peak-normalizes the result (the "pydub" concat mode's levelling)."""
+    combined_audio = AudioSegment.empty()
+    for segment in segments:
+        combined_audio += segment
+    return combined_audio.normalize()
+
+def _concatenate_with_pydub(temp_files: List[str], output_file: Union[str, BinaryIO]) -> float:
+    """Decodes every chunk, joins and peak-normalizes them, and re-encodes the result."""
+    combined_audio = join_and_normalize(AudioSegment.from_mp3(temp_file_path) for temp_file_path in temp_files)
+    if isinstance(output_file, str):
+        combined_audio.export(output_file, format="mp3")
+    else:
+        # pydub seeks in the file it exports to, which upload streams don't support.
+        with tempfile.TemporaryFile() as encoded:
+            combined_audio.export(encoded, format="mp3")
+            encoded.seek(0)
+            shutil.copyfileobj(encoded, output_file)
+    logging.info(f"Concatenated audio saved as: {_describe_output(output_file)}")
+
+    return combined_audio.duration_seconds
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+from google.cloud import texttospeech
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from config import Config
+from app.gcp_clients import get_storage_client
+
+def make_chunk_cache_key(
+    chunk: str,
+    voice: texttospeech.VoiceSelectionParams,
+    audio_config: texttospeech.AudioConfig,
+    use_ssml: bool = False
+) -> str:
+    """Builds a content address for a chunk from its text and every setting that affects the audio."""
+    key_fields = {
+        "text_sha256": hashlib.sha256(chunk.encode("utf-8")).hexdigest(),
+        "voice_name": voice.name,
+        "language_code": voice.language_code,
+        "ssml_gender": int(voice.ssml_gender),
+        "audio_config": texttospeech.AudioConfig.to_dict(audio_config),
+        "use_ssml": bool(use_ssml),
+    }
+    return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+class LocalChunkCache:
+    """On-disk chunk cache evicting least recently used entries once `max_bytes` is exceeded."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _load_index(self) -> None:
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".mp3"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                found.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        logging.info(f"TTS chunk cache loaded {len(self._entries)} entries ({self._total_bytes} bytes) from {self.directory}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime doubles as the LRU timestamp across restarts
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:  # written by another worker process sharing the directory
+                self._entries[key] = len(data)
+                self._total_bytes += len(data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def _forget(self, key: str) -> None:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            logging.debug(f"Evicted TTS chunk {key} from local cache")
+
+class GCSChunkCache:
+    """Chunk cache stored as objects under a prefix in a GCS bucket, shared by every instance."""
+
+    def __init__(self, bucket_name: str, prefix: str = "tts-cache/"):
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    @property
+    def bucket(self):
+        # Resolved per call so a forked process uses its own client.
+        return get_storage_client().bucket(self.bucket_name)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.bucket.blob(f"{self.prefix}{key}.mp3").download_as_bytes()
+        except NotFound:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        try:
+            self.bucket.blob(f"{self.prefix}{key}.mp3").upload_from_string(
+                data, content_type="audio/mpeg", if_generation_match=0
+            )
+        except PreconditionFailed:
+            pass  # Another worker already stored the same chunk.
+
+class TieredChunkCache:
+    """Looks in the local cache first, then the GCS tier, back-filling the local cache on a remote hit.
+
+    Either tier may be None. Cache failures are logged and treated as misses so they never fail a synthesis.
+    """
+
+    def __init__(self, local: Optional[LocalChunkCache], remote: Optional[GCSChunkCache] = None):
+        self.local = local
+        self.remote = remote
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            data = self.local.get(key) if self.local else None
+            if data is None and self.remote:
+                data = self.remote.get(key)
+                if data is not None and self.local:
+                    self.local.put(key, data)
+            return data
+        except Exception as e:
+            logging.warning(f"TTS chunk cache lookup failed for {key}: {e}")
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        try:
+            if self.local:
+                self.local.put(key, data)
+            if self.remote:
+                self.remote.put(key, data)
+        except Exception as e:
+            logging.warning(f"TTS chunk cache write failed for {key}: {e}")
+
+_chunk_cache = None
+_chunk_cache_lock = threading.Lock()
+
+def get_chunk_cache() -> Optional[TieredChunkCache]:
+    """Returns the process-wide chunk cache, or None when caching is disabled."""
+    global _chunk_cache
+    if not Config.TTS_CACHE_ENABLED:
+        return None
+    with _chunk_cache_lock:
+        if _chunk_cache is None:
+            local = remote = None
+            try:
+                local = LocalChunkCache(Config.TTS_CACHE_DIR, Config.TTS_CACHE_MAX_MB * 1024 * 1024)
+            except Exception as e:
+                # e.g. a read-only or full filesystem; synthesis must still work without the cache.
+                logging.warning(f"Local tier of the TTS chunk cache is unavailable ({Config.TTS_CACHE_DIR}): {e}")
+            if Config.TTS_CACHE_GCS_BUCKET:
+                try:
+                    remote = GCSChunkCache(Config.TTS_CACHE_GCS_BUCKET, Config.TTS_CACHE_GCS_PREFIX)
+                except Exception as e:
+                    logging.warning(f"GCS tier of the TTS chunk cache is unavailable: {e}")
+            _chunk_cache = TieredChunkCache(local, remote)
+        return _chunk_cache
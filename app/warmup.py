@@ -0,0 +1,34 @@
+import importlib
+import logging
+import threading
+import time
+from typing import Optional
+from config import Config
+
+# Modules kept off the web startup path; each is imported on first use unless preloaded here.
+HEAVY_MODULES = (
+    "app.text_extraction",
+    "app.async_fetcher",
+    "app.text_to_speech_service",
+    "app.cloud_storage",
+)
+
+def preload_heavy_modules() -> float:
+    """Imports HEAVY_MODULES now; returns the seconds it took."""
+    started = time.perf_counter()
+    for module_name in HEAVY_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logging.error(f"Could not preload {module_name}: {e}")
+    elapsed = time.perf_counter() - started
+    logging.info(f"Preloaded {len(HEAVY_MODULES)} modules in {elapsed:.2f}s.")
+    return elapsed
+
+def apply_startup_imports(mode: Optional[str] = None) -> None:
+    """Applies STARTUP_IMPORTS: "eager" preloads now, "background" in a daemon thread, "lazy" does nothing."""
+    mode = mode or Config.STARTUP_IMPORTS
+    if mode == "eager":
+        preload_heavy_modules()
+    elif mode == "background":
+        threading.Thread(target=preload_heavy_modules, name="preload-imports", daemon=True).start()
@@ -10,12 +10,138 @@ class Config:
     )
     GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "speakloudaudio")
 
+    # Startup: "lazy" imports TTS, extraction and Storage libraries on first use, "background" imports
+    # them in a thread once the app is up, "eager" before serving (see app/warmup.py)
+    STARTUP_IMPORTS = os.getenv("STARTUP_IMPORTS", "lazy")
+    # Directory holding the nltk punkt model (python -m nltk.downloader -d <dir> punkt)
+    NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data"))
+
     # App-specific settings
     TTS_LANGUAGE_CODE = os.getenv("TTS_LANGUAGE_CODE", "en-US")
     TTS_VOICE_GENDER = os.getenv("TTS_VOICE_GENDER", "NEUTRAL")
+    # Sentence segmenter for TTS chunking: "punkt" (nltk), "regex" (fastest) or "pysbd" (if installed)
+    TTS_SEGMENTER = os.getenv("TTS_SEGMENTER", "punkt")
+    # Worker threads used to synthesize the chunks of one article (1 = sequential)
+    TTS_MAX_WORKERS = int(os.getenv("TTS_MAX_WORKERS", "4"))
+    # Upper bound on concurrent synthesize_speech calls across the whole process
+    TTS_MAX_IN_FLIGHT = int(os.getenv("TTS_MAX_IN_FLIGHT", "8"))
+    # Content-addressed cache of synthesized chunks (local LRU plus optional GCS tier)
+    TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "cache/tts")
+    TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+    TTS_CACHE_GCS_BUCKET = os.getenv("TTS_CACHE_GCS_BUCKET", "")
+    TTS_CACHE_GCS_PREFIX = os.getenv("TTS_CACHE_GCS_PREFIX", "tts-cache/")
+    # How chunk audio is joined: "stream" (frame-level copy) or "pydub" (decode/re-encode)
+    TTS_CONCAT_MODE = os.getenv("TTS_CONCAT_MODE", "stream")
+    # Loudness handling for the stream mode: "none" or "loudnorm" (one streaming ffmpeg pass)
+    TTS_NORMALIZE = os.getenv("TTS_NORMALIZE", "none")
+    TTS_VOLUME_GAIN_DB = float(os.getenv("TTS_VOLUME_GAIN_DB", "0.0"))
+    TTS_EFFECTS_PROFILE_IDS = [p.strip() for p in os.getenv("TTS_EFFECTS_PROFILE_IDS", "").split(",") if p.strip()]
+    # Streamed playback (POST /stream_article). Streams live in the memory of the process that started them,
+    # so only enable it where one process serves every request; finished streams are kept for replays/redirects
+    STREAM_PLAYBACK_ENABLED = os.getenv("STREAM_PLAYBACK_ENABLED", "false").lower() == "true"
+    STREAM_RETENTION_SECONDS = float(os.getenv("STREAM_RETENTION_SECONDS", "300"))
     
+    # Shared Google Cloud clients (app/gcp_clients.py): gRPC channel options and GCS HTTP pool size
+    GRPC_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000"))
+    GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))
+    GRPC_MAX_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_MESSAGE_BYTES", "-1"))
+    GCS_HTTP_POOL_SIZE = int(os.getenv("GCS_HTTP_POOL_SIZE", "16"))
+
+    # How audio reaches GCS: "stream" (resumable upload fed during concatenation),
+    # "buffer" (in memory, spilling to disk past UPLOAD_SPOOL_MAX_MB) or "local" (file in DOWNLOADS_DIR)
+    UPLOAD_MODE = os.getenv("UPLOAD_MODE", "stream")
+    UPLOAD_CHUNK_SIZE_MB = int(os.getenv("UPLOAD_CHUNK_SIZE_MB", "8"))
+    UPLOAD_SPOOL_MAX_MB = int(os.getenv("UPLOAD_SPOOL_MAX_MB", "32"))
+    # "buffer" and "local" uploads of at least UPLOAD_COMPOSITE_THRESHOLD_MB are sent as parallel parts and composed;
+    # "stream" uploads already run alongside synthesis and are never composed
+    UPLOAD_COMPOSITE_THRESHOLD_MB = int(os.getenv("UPLOAD_COMPOSITE_THRESHOLD_MB", "64"))
+    UPLOAD_COMPOSITE_PARTS = int(os.getenv("UPLOAD_COMPOSITE_PARTS", "8"))
+    UPLOAD_COMPOSITE_WORKERS = int(os.getenv("UPLOAD_COMPOSITE_WORKERS", "8"))
+    UPLOAD_COMPOSITE_PREFIX = os.getenv("UPLOAD_COMPOSITE_PREFIX", "_composite_parts/")
+    # Skip uploads whose content is already stored, using a Firestore index of MD5 -> object name (every UPLOAD_MODE;
+    # "stream" hashes while uploading and abandons the session of a duplicate instead of finalizing it)
+    UPLOAD_DEDUP_ENABLED = os.getenv("UPLOAD_DEDUP_ENABLED", "true").lower() == "true"
+    UPLOAD_HASH_COLLECTION = os.getenv("UPLOAD_HASH_COLLECTION", "audio_hashes")
+    # Local mode: uploaded files are deleted unless DOWNLOADS_KEEP_LOCAL; leftovers are swept by age and size
+    DOWNLOADS_DIR = os.getenv("DOWNLOADS_DIR", "downloads")
+    DOWNLOADS_KEEP_LOCAL = os.getenv("DOWNLOADS_KEEP_LOCAL", "false").lower() == "true"
+    DOWNLOADS_MAX_AGE_HOURS = float(os.getenv("DOWNLOADS_MAX_AGE_HOURS", "24"))
+    DOWNLOADS_MAX_MB = int(os.getenv("DOWNLOADS_MAX_MB", "1024"))
+
     # Database configuration (Firestore in this case)
     FIRESTORE_PROJECT_ID = os.getenv("FIRESTORE_PROJECT_ID", "speakloudaudio")
+    # Local SQLite database (job queue and other process-local state)
+    SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "/app/data/processed_articles.db")
+    # Counter shards per article for listen counts (more shards allow more listens per second)
+    LISTEN_COUNTER_SHARDS = int(os.getenv("LISTEN_COUNTER_SHARDS", "10"))
+    # Listen events are buffered in-process and written in batches ("false" writes each one immediately)
+    LISTEN_BUFFER_ENABLED = os.getenv("LISTEN_BUFFER_ENABLED", "true").lower() == "true"
+    LISTEN_BUFFER_MAX_EVENTS = int(os.getenv("LISTEN_BUFFER_MAX_EVENTS", "100"))
+    LISTEN_BUFFER_FLUSH_INTERVAL = float(os.getenv("LISTEN_BUFFER_FLUSH_INTERVAL", "5"))
+    LISTEN_BUFFER_MAX_PENDING = int(os.getenv("LISTEN_BUFFER_MAX_PENDING", "10000"))
+
+    # Where list/sort/hashtag reads come from: "firestore" or "replica" (SQLite copy kept current by replica_sync.py)
+    ARTICLE_READ_SOURCE = os.getenv("ARTICLE_READ_SOURCE", "firestore")
+    REPLICA_SYNC_INTERVAL = float(os.getenv("REPLICA_SYNC_INTERVAL", "30"))
+    REPLICA_FULL_SYNC_INTERVAL = float(os.getenv("REPLICA_FULL_SYNC_INTERVAL", "3600"))
+    # Deletions leave a tombstone for incremental syncs; full syncs prune those older than this
+    REPLICA_TOMBSTONE_RETENTION = float(os.getenv("REPLICA_TOMBSTONE_RETENTION", str(7 * 24 * 3600)))
+    # Local full-text index (SQLite FTS5) updated when articles are saved; serves /search
+    SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+    # In-process TTL+LRU cache of article lookups; ARTICLE_CACHE_WATCH keeps processes coherent via on_snapshot.
+    # Another process's save or delete would otherwise go unseen (a stale duplicate check) until the TTL runs out
+    ARTICLE_CACHE_ENABLED = os.getenv("ARTICLE_CACHE_ENABLED", "true").lower() == "true"
+    ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", "300"))
+    ARTICLE_CACHE_MAX_ENTRIES = int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", "1024"))
+    ARTICLE_CACHE_WATCH = os.getenv("ARTICLE_CACHE_WATCH", str(ARTICLE_CACHE_ENABLED)).lower() == "true"
+
+    # Article processing: "inline" runs POSTs in the request, "queue" hands them to worker.py
+    # (the SQLite queue needs the web and worker processes to share SQLITE_DB_PATH's filesystem)
+    PROCESSING_MODE = os.getenv("PROCESSING_MODE", "inline")
+    JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Running jobs that report no progress for this long are handed to another worker
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "1800"))
+    WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2.0"))
+
+    # Article page fetching (app/http_client.py): keep-alive pools per host and conditional-GET cache
+    HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "8"))
+    HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "128"))
+    HTTP_CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", "86400"))
+
+    # Article extraction (app/text_extraction.py): parsers tried in order, per-domain overrides
+    # ("domain=parser,parser;..."), and the quality score at which the remaining parsers are skipped
+    EXTRACTION_PARSERS = os.getenv("EXTRACTION_PARSERS", "newspaper,trafilatura,lxml")
+    EXTRACTION_DOMAIN_PARSERS = os.getenv("EXTRACTION_DOMAIN_PARSERS", "nytimes.com=trafilatura,newspaper,lxml")
+    EXTRACTION_GOOD_ENOUGH_SCORE = float(os.getenv("EXTRACTION_GOOD_ENOUGH_SCORE", "400"))
+
+    # Extracted articles are reused for this long (preview, then process), keeping the most recently used entries
+    EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", "3600"))
+    EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "500"))
+
+    # Batch imports (services.process_multiple_articles)
+    BATCH_FETCH_WORKERS = int(os.getenv("BATCH_FETCH_WORKERS", "8"))
+    # Articles synthesized at once; chunk-level calls stay capped by TTS_MAX_IN_FLIGHT
+    BATCH_TTS_WORKERS = int(os.getenv("BATCH_TTS_WORKERS", "2"))
+    BATCH_DOMAIN_CONCURRENCY = int(os.getenv("BATCH_DOMAIN_CONCURRENCY", "2"))
+    # Minimum seconds between starting two fetches against the same domain
+    BATCH_DOMAIN_INTERVAL = float(os.getenv("BATCH_DOMAIN_INTERVAL", "1.0"))
+    # "async": fetch with app/async_fetcher.py and parse on a process pool; "threads": BATCH_FETCH_WORKERS threads
+    BATCH_FETCH_MODE = os.getenv("BATCH_FETCH_MODE", "async")
+    BULK_FETCH_CONCURRENCY = int(os.getenv("BULK_FETCH_CONCURRENCY", "32"))
+    BULK_FETCH_TIMEOUT = float(os.getenv("BULK_FETCH_TIMEOUT", "20"))
+    BULK_PARSE_PROCESSES = int(os.getenv("BULK_PARSE_PROCESSES", "0"))  # 0: one per CPU
+    BULK_RESPECT_ROBOTS = os.getenv("BULK_RESPECT_ROBOTS", "true").lower() == "true"
+
+    # Duplicate-submission coalescing: cross-process lease backend is "sqlite", "firestore" or "none"
+    SINGLE_FLIGHT_BACKEND = os.getenv("SINGLE_FLIGHT_BACKEND", "sqlite")
+    SINGLE_FLIGHT_LEASE_SECONDS = int(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", "1800"))
+    SINGLE_FLIGHT_POLL_INTERVAL = float(os.getenv("SINGLE_FLIGHT_POLL_INTERVAL", "2.0"))
+    # How long an inline POST /process_article waits for another process's render before answering 409
+    SINGLE_FLIGHT_REQUEST_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_REQUEST_WAIT_SECONDS", "0"))
 
     # Logging configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
\ No newline at end of file
@@ -1,35 +1,136 @@
+import os
 import sqlite3
 import logging
+from config import Config
 
-def initialize_database(db_path: str = "/app/data/processed_articles.db"):
+def initialize_database(db_path: str = Config.SQLITE_DB_PATH):
     """Initializes the database and creates necessary tables if they do not exist."""
-    logging.basicConfig(level=logging.INFO)
     logging.info("Initializing the database...")
+    conn = None
     try:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
         # Connect to the database
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
 
-        # Create the 'articles' table if it does not exist
+        # Replace the legacy 'articles' table (integer ids, never populated) with the replica schema
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(articles)")]
+        if columns and "updated_at" not in columns:
+            if cursor.execute("SELECT COUNT(*) FROM articles").fetchone()[0]:
+                cursor.execute("ALTER TABLE articles RENAME TO articles_legacy")
+                logging.info("Renamed the legacy articles table to articles_legacy.")
+            else:
+                cursor.execute("DROP TABLE articles")
+
+        # Create the 'articles' table: a read replica of the Firestore articles collection (see app/article_replica.py)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT PRIMARY KEY,
                 title TEXT,
                 source TEXT,
                 url TEXT,
+                normalized_url TEXT,
                 publish_date TEXT,
                 processed_date TEXT,
                 download_link TEXT,
-                authors TEXT DEFAULT 'Unknown'
+                authors TEXT DEFAULT 'Unknown',
+                hashtags TEXT,
+                voice_name TEXT,
+                audio_length REAL,
+                updated_at REAL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_url ON articles (url)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_normalized_url ON articles (normalized_url)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_processed_date ON articles (processed_date, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_publish_date ON articles (publish_date, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_title ON articles (title, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source, id)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS article_hashtags (
+                hashtag TEXT NOT NULL,
+                article_id TEXT NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+                PRIMARY KEY (hashtag, article_id)
             )
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_article_hashtags_article ON article_hashtags (article_id)")
+
+        # Create the full-text search index over articles (see app/search_index.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS search_documents (
+                doc_id INTEGER PRIMARY KEY,
+                article_id TEXT UNIQUE NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                url UNINDEXED,
+                source UNINDEXED,
+                processed_date UNINDEXED,
+                title,
+                authors,
+                text_content,
+                tokenize = 'porter unicode61'
+            )
+        """)
+
+        # Create the 'sync_state' table recording how far the replica has caught up with Firestore
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+
+        # Create the 'jobs' table backing the SQLite job queue (see app/job_queue.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT,
+                progress REAL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER DEFAULT 0,
+                worker_id TEXT,
+                available_at REAL,
+                started_at REAL,
+                created_at REAL,
+                updated_at REAL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs (status, available_at)")
+
+        # Create the 'processing_leases' table used to coalesce duplicate submissions (see app/single_flight.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS processing_leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+        # Create the 'extraction_cache' table of recently extracted articles (see app/extraction_cache.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                normalized_url TEXT PRIMARY KEY,
+                article_data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_used ON extraction_cache (last_used_at)")
         conn.commit()
         logging.info("Database initialized successfully.")
     except sqlite3.Error as e:
         logging.error(f"Database initialization error: {e}")
         raise
     finally:
-        conn.close()
+        if conn:
+            conn.close()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     initialize_database()
\ No newline at end of file
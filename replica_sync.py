@@ -0,0 +1,43 @@
+# replica_sync.py
+import argparse
+import logging
+import signal
+import time
+from config import Config
+from app.article_replica import get_article_replica
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+_stop_requested = False
+
+def _request_stop(signum, frame):
+    global _stop_requested
+    logging.info(f"Received signal {signum}; stopping after the current sync.")
+    _stop_requested = True
+
+def run_sync(interval: float = Config.REPLICA_SYNC_INTERVAL,
+             full_interval: float = Config.REPLICA_FULL_SYNC_INTERVAL,
+             once: bool = False, full: bool = False) -> None:
+    """Keeps the SQLite replica current: incremental syncs every `interval`, full syncs every `full_interval`."""
+    replica = get_article_replica()
+    while not _stop_requested:
+        try:
+            replica.sync(full=full or replica.seconds_since_full_sync() >= full_interval)
+            full = False
+        except Exception as e:
+            logging.error(f"Replica sync failed: {e}", exc_info=True)
+        if once:
+            break
+        time.sleep(interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirrors the Firestore articles collection into the SQLite replica.")
+    parser.add_argument("--once", action="store_true", help="Run a single sync and exit.")
+    parser.add_argument("--full", action="store_true", help="Start with a full sync.")
+    parser.add_argument("--interval", type=float, default=Config.REPLICA_SYNC_INTERVAL)
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+    run_sync(interval=args.interval, once=args.once, full=args.full)
@@ -1,9 +1,10 @@
 # run.py
 from flask import Flask
-from google.cloud import firestore
 import os
 from config import Config
 import logging
+from app.gcp_clients import get_firestore_client
+from app.warmup import apply_startup_imports
 
 # Import Blueprint from routes
 try:
@@ -29,15 +30,15 @@ app.config.from_object(Config)
 # Register the Blueprint
 app.register_blueprint(main)
 
+# Import the TTS/extraction libraries now, in the background or on first use (STARTUP_IMPORTS)
+apply_startup_imports()
+
 # Check and log GCS_BUCKET_NAME
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME")
 logging.info(f"Using GCS_BUCKET_NAME: {GCS_BUCKET_NAME}")
 
 # Initialize Firestore database
-firestore_db = None
-
 def initialize_firestore():
-    global firestore_db
     google_credentials = Config.GOOGLE_APPLICATION_CREDENTIALS
     if google_credentials and os.path.isfile(google_credentials):
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = google_credentials
@@ -46,7 +47,7 @@ def initialize_firestore():
         logging.error("GOOGLE_APPLICATION_CREDENTIALS file is missing or invalid.")
         raise EnvironmentError("Valid GOOGLE_APPLICATION_CREDENTIALS is required.")
     try:
-        firestore_db = firestore.Client()
+        get_firestore_client()
         logging.info("Firestore successfully initialized.")
     except Exception as e:
         logging.error(f"Failed to initialize Firestore: {e}")
@@ -54,18 +55,16 @@ def initialize_firestore():
 
 initialize_firestore()
 
-# Make Firestore client accessible across the app
+# Make Firestore client accessible across the app (the shared client of the serving process)
 @app.before_request
 def setup_firestore():
-    if firestore_db:
-        app.config["firestore_db"] = firestore_db
+    app.config["firestore_db"] = get_firestore_client()
 
 # Health check endpoint
 @app.route("/health")
 def health():
     try:
-        if firestore_db:
-            firestore_db.collection("test").limit(1).get()  # Quick test query
+        get_firestore_client().collection("test").limit(1).get()  # Quick test query
         return "Healthy", 200
     except Exception as e:
         logging.error(f"Health check failed: {e}")
@@ -0,0 +1,94 @@
+"""Checks the MP3/WAV header parsing and frame-level concatenation in app.audio_processing.
+
+The fixtures are tiny sine tones encoded once with ffmpeg (libmp3lame, -fflags +bitexact), so
+these tests need neither ffmpeg nor network access:
+
+    tts_24k_mono_32k.mp3       0.5 s, MPEG-2 24 kHz mono CBR, Info frame with a LAME (Lavf) gapless tag
+    no_info_24k_mono_32k.mp3   0.75 s tone, same format, -write_xing 0 (no Info frame, no ID3v2 tag)
+    stereo_44k_128k.mp3        0.4 s, MPEG-1 44.1 kHz stereo CBR, Info frame with a gapless tag
+    vbr_22k_mono.mp3           0.6 s, MPEG-2 22.05 kHz mono VBR (-q:a 5), Xing frame with a gapless tag
+    linear16_24k.wav           0.1 s, 24 kHz mono pcm_s16le
+    quiet_linear16_24k.wav     the same tone at a tenth of the volume
+"""
+import io
+from pathlib import Path
+import pytest
+from app.audio_processing import (
+    AudioProcessingError,
+    audio_duration,
+    concatenate_mp3_chunks,
+    iter_mp3_frames,
+    mp3_duration,
+    wav_duration,
+    write_mp3_frames,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# file name -> (frames including the Info/Xing frame, Info/Xing frames, sample rate, samples per frame)
+MP3_FIXTURES = {
+    "tts_24k_mono_32k.mp3": (24, 1, 24000, 576),
+    "no_info_24k_mono_32k.mp3": (34, 0, 24000, 576),
+    "stereo_44k_128k.mp3": (18, 1, 44100, 1152),
+    "vbr_22k_mono.mp3": (26, 1, 22050, 576),
+}
+
+def read_fixture(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+@pytest.mark.parametrize("name", sorted(MP3_FIXTURES))
+def test_frame_counts(name):
+    frame_count, info_frames, sample_rate, samples = MP3_FIXTURES[name]
+    frames = list(iter_mp3_frames(read_fixture(name)))
+    assert len(frames) == frame_count
+    assert sum(frame.is_info_frame for frame in frames) == info_frames
+    assert {frame.sample_rate for frame in frames} == {sample_rate}
+    assert {frame.samples for frame in frames} == {samples}
+
+@pytest.mark.parametrize("name, seconds", [
+    ("tts_24k_mono_32k.mp3", 0.5),
+    ("stereo_44k_128k.mp3", 0.4),
+    ("vbr_22k_mono.mp3", 0.6),
+])
+def test_gapless_tag_trims_encoder_delay_and_padding(name, seconds):
+    assert mp3_duration(read_fixture(name)) == pytest.approx(seconds, abs=1e-6)
+
+def test_duration_without_info_frame_counts_every_frame():
+    assert mp3_duration(read_fixture("no_info_24k_mono_32k.mp3")) == pytest.approx(34 * 576 / 24000)
+
+def test_id3v1_tag_and_leading_junk_are_skipped():
+    data = read_fixture("tts_24k_mono_32k.mp3")
+    tagged = b"\x00\x01junk" + data + b"TAG" + b"\x00" * 125
+    assert len(list(iter_mp3_frames(tagged))) == 24
+    assert mp3_duration(tagged) == pytest.approx(0.5, abs=1e-6)
+
+def test_wav_duration():
+    assert audio_duration(read_fixture("linear16_24k.wav"), "LINEAR16") == pytest.approx(0.1)
+    # Headerless PCM falls back to 24 kHz mono 16-bit.
+    assert wav_duration(b"\x00" * 4800) == pytest.approx(0.1)
+
+def test_write_mp3_frames_drops_info_frame():
+    output = io.BytesIO()
+    seconds = write_mp3_frames(read_fixture("tts_24k_mono_32k.mp3"), output)
+    frames = list(iter_mp3_frames(output.getvalue()))
+    assert len(frames) == 23
+    assert not any(frame.is_info_frame for frame in frames)
+    assert seconds == pytest.approx(23 * 576 / 24000)
+
+def test_concatenate_mp3_chunks(tmp_path):
+    chunk_files = [str(FIXTURES / "tts_24k_mono_32k.mp3"), str(FIXTURES / "no_info_24k_mono_32k.mp3")]
+    output = io.BytesIO()
+    seconds = concatenate_mp3_chunks(chunk_files, output)
+    data = output.getvalue()
+    frames = list(iter_mp3_frames(data))
+    assert data[:1] == b"\xff"
+    assert len(frames) == 23 + 34
+    assert not any(frame.is_info_frame for frame in frames)
+    assert seconds == pytest.approx((23 + 34) * 576 / 24000)
+    assert mp3_duration(data) == pytest.approx(seconds)
+
+def test_concatenate_rejects_chunk_without_frames(tmp_path):
+    bad_chunk = tmp_path / "bad.mp3"
+    bad_chunk.write_bytes(b"not audio at all")
+    with pytest.raises(AudioProcessingError):
+        concatenate_mp3_chunks([str(bad_chunk)], io.BytesIO())
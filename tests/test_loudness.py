@@ -0,0 +1,54 @@
+"""Checks loudness handling without ffmpeg: pydub peak normalization on WAV fixtures, and the
+streaming loudnorm pipe driven by a stand-in ffmpeg that copies stdin to stdout."""
+import io
+import sys
+from pathlib import Path
+import pytest
+from pydub import AudioSegment
+import app.audio_processing as audio_processing
+from app.audio_processing import AudioProcessingError, concatenate_mp3_chunks, iter_mp3_frames
+from app.text_to_speech_service import join_and_normalize
+
+FIXTURES = Path(__file__).parent / "fixtures"
+CHUNK_FILES = [str(FIXTURES / "tts_24k_mono_32k.mp3"), str(FIXTURES / "no_info_24k_mono_32k.mp3")]
+
+def fake_ffmpeg(tmp_path: Path, body: str) -> str:
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\nimport shutil, sys\n{body}\n")
+    script.chmod(0o755)
+    return str(script)
+
+def test_join_and_normalize_peak_normalizes_wav_chunks():
+    loud = AudioSegment.from_wav(FIXTURES / "linear16_24k.wav")
+    quiet = AudioSegment.from_wav(FIXTURES / "quiet_linear16_24k.wav")
+    assert quiet.max_dBFS == pytest.approx(loud.max_dBFS - 20, abs=0.5)
+
+    normalized = join_and_normalize([quiet, quiet])
+    assert normalized.duration_seconds == pytest.approx(0.2)
+    # pydub leaves 0.1 dB of headroom below full scale.
+    assert normalized.max_dBFS == pytest.approx(-0.1, abs=0.05)
+
+    mixed = join_and_normalize([loud, quiet])
+    assert mixed.max_dBFS == pytest.approx(-0.1, abs=0.05)
+    assert mixed[100:].max_dBFS == pytest.approx(mixed[:100].max_dBFS - 20, abs=0.5)
+
+def test_loudnorm_without_ffmpeg_fails_before_writing(monkeypatch):
+    monkeypatch.setattr(audio_processing.shutil, "which", lambda name: None)
+    output = io.BytesIO()
+    with pytest.raises(AudioProcessingError, match="ffmpeg is required"):
+        concatenate_mp3_chunks(CHUNK_FILES, output, normalize=True)
+    assert output.getvalue() == b""
+
+def test_loudnorm_pipes_frames_through_ffmpeg(monkeypatch, tmp_path):
+    ffmpeg = fake_ffmpeg(tmp_path, "shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)")
+    monkeypatch.setattr(audio_processing.shutil, "which", lambda name: ffmpeg)
+    output = io.BytesIO()
+    seconds = concatenate_mp3_chunks(CHUNK_FILES, output, normalize=True)
+    assert len(list(iter_mp3_frames(output.getvalue()))) == 23 + 34
+    assert seconds == pytest.approx((23 + 34) * 576 / 24000)
+
+def test_loudnorm_failure_is_reported(monkeypatch, tmp_path):
+    ffmpeg = fake_ffmpeg(tmp_path, "sys.stdin.buffer.read()\nsys.stderr.write('bad filter')\nsys.exit(1)")
+    monkeypatch.setattr(audio_processing.shutil, "which", lambda name: ffmpeg)
+    with pytest.raises(AudioProcessingError, match="bad filter"):
+        concatenate_mp3_chunks(CHUNK_FILES, io.BytesIO(), normalize=True)
@@ -0,0 +1,25 @@
+"""Backfills the sharded listen counters and rolled-up listen counts from the existing listens subcollections.
+
+Usage:
+    python -m utils.backfill_listen_counters [ARTICLE_ID ...]
+
+Without ids every article is backfilled. Safe to rerun: each article's shards and its
+`listen_count` field are reset to a count() aggregation over its listens.
+"""
+import argparse
+import logging
+import sys
+from app.listen_counters import backfill_listen_counters
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("article_ids", nargs="*", help="Articles to backfill (default: all).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    updated = backfill_listen_counters(args.article_ids or None)
+    print(f"Backfilled {updated} listen counters.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Benchmarks list reads with and without the field projection used by the list views.
+
+Usage:
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m utils.benchmark_article_projection \\
+        [--articles 200] [--text-kb 30] [--repeat 5]
+
+Seeds the emulator's "articles" collection with synthetic articles (each carrying
+`--text-kb` of text_content), then times get_all_articles, get_recent_articles and
+get_articles_by_hashtag reading whole documents versus ARTICLE_LIST_FIELDS. Bytes are
+the encoded size of the returned Document messages. Refuses to run outside the emulator.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from google.cloud.firestore_v1 import _helpers
+from google.cloud.firestore_v1.types import document
+
+def document_bytes(article: dict) -> int:
+    data = {key: value for key, value in article.items() if key != "id"}
+    message = document.Document(name=article["id"], fields=_helpers.encode_dict(data))
+    return document.Document.pb(message).ByteSize()
+
+def seed(client, count: int, text_kb: int) -> None:
+    collection = client.collection("articles")
+    for doc in collection.list_documents():
+        doc.delete()
+    batch = client.batch()
+    for i in range(count):
+        batch.set(collection.document(f"bench-{i:05d}"), {
+            "title": f"Benchmark article {i}",
+            "source": "bench.example.com",
+            "url": f"https://bench.example.com/articles/{i}",
+            "normalized_url": f"https://bench.example.com/articles/{i}",
+            "publish_date": "2024-01-01",
+            "processed_date": f"2024-01-{i % 28 + 1:02d}",
+            "download_link": f"https://storage.googleapis.com/bench/{i}.mp3",
+            "authors": "Bench",
+            "text_content": "lorem ipsum " * (text_kb * 1024 // 12),
+            "hashtags": ["bench", f"group{i % 4}"],
+            "voice_name": "en-US-Wavenet-D",
+            "audio_length": 123.4,
+        })
+        if i % 400 == 399:
+            batch.commit()
+            batch = client.batch()
+    batch.commit()
+
+def measure(read, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        articles = read()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), sum(document_bytes(article) for article in articles), len(articles)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--text-kb", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        print("FIRESTORE_EMULATOR_HOST is not set; this benchmark only runs against the emulator.")
+        return 1
+
+    from app.firestore_database_operations import (
+        ARTICLE_LIST_FIELDS,
+        get_all_articles,
+        get_articles_by_hashtag,
+        get_recent_articles,
+    )
+
+    from app.gcp_clients import get_firestore_client
+
+    seed(get_firestore_client(), args.articles, args.text_kb)
+    reads = [
+        ("get_all_articles", lambda fields: get_all_articles(fields=fields)),
+        ("get_recent_articles(5)", lambda fields: get_recent_articles(limit=5, fields=fields)),
+        ("get_articles_by_hashtag", lambda fields: get_articles_by_hashtag("group1", fields=fields)),
+    ]
+    print(f"{'read':<26} {'fields':<10} {'rows':>5} {'bytes':>12} {'median ms':>10}")
+    for name, read in reads:
+        for label, fields in (("full", None), ("projected", ARTICLE_LIST_FIELDS)):
+            seconds, size, rows = measure(lambda: read(fields), args.repeat)
+            print(f"{name:<26} {label:<10} {rows:>5} {size:>12,} {seconds * 1000:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Benchmarks TTS text chunking on long articles.
+
+Usage:
+    python -m utils.benchmark_chunking [--kb 100 200 500] [--max-bytes 5000] [--repeat 5] [--file article.txt]
+
+Times the previous chunker (nltk punkt, re-encoding the growing chunk for every sentence)
+against app.text_chunking.chunk_text with each available segmenter, on synthetic
+articles of the given sizes (or on --file). Every chunking is checked for chunks over
+--max-bytes or empty chunks. Segmentation and packing are timed together, since both
+run on every article.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List
+from app.text_chunking import PYSBD_AVAILABLE, SEGMENTERS, chunk_text, split_sentences_punkt
+
+_WORDS = ("the council said on Tuesday that its plan would reduce costs for residents while "
+          "critics argued the proposal ignored rising demand across the region and beyond").split()
+
+def synthetic_article(size_kb: int, seed: int = 0) -> str:
+    """Paragraphs of 8-40 word sentences, with abbreviations, quotes and the odd 6 kB run-on sentence."""
+    rng = random.Random(seed)
+    sentences, size = [], 0
+    while size < size_kb * 1024:
+        if rng.random() < 0.002:
+            sentence = ", ".join(" ".join(rng.choices(_WORDS, k=12)) for _ in range(90)).capitalize() + "."
+        else:
+            sentence = " ".join(rng.choices(_WORDS, k=rng.randint(8, 40))).capitalize()
+            sentence += rng.choice([".", ".", ".", "?", "!", ', said Dr. Smith.', '," Mr. Jones said.'])
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return "\n\n".join(" ".join(sentences[i:i + 6]) for i in range(0, len(sentences), 6))
+
+def legacy_chunker(text: str, max_bytes: int) -> List[str]:
+    """The chunker that split_text_by_bytes used before app/text_chunking.py."""
+    chunks, current_chunk = [], ""
+    for sentence in split_sentences_punkt(text):
+        sentence_bytes = len(sentence.encode('utf-8'))
+        if len(current_chunk.encode('utf-8')) + sentence_bytes <= max_bytes:
+            current_chunk += sentence + " "
+        else:
+            chunks.append(current_chunk.strip())
+            current_chunk = sentence + " "
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+def time_chunker(chunker: Callable[[], List[str]], repeat: int) -> tuple:
+    chunker()  # Warm-up: keeps one-off imports (nltk, pysbd) out of the timings.
+    timings, chunks = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = chunker()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), chunks
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", type=int, nargs="+", default=[100, 200, 500])
+    parser.add_argument("--max-bytes", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--file", help="Benchmark this text file instead of synthetic articles.")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            texts = [(args.file, f.read())]
+    else:
+        texts = [(f"{kb} kB synthetic", synthetic_article(kb)) for kb in args.kb]
+
+    segmenters = [name for name in SEGMENTERS if name != "pysbd" or PYSBD_AVAILABLE]
+    print(f"{'text':<20} {'chunker':<16} {'median ms':>10} {'chunks':>7} {'largest B':>10} {'over':>5} {'empty':>6}")
+    failed = False
+    for label, text in texts:
+        candidates = [("legacy (punkt)", lambda: legacy_chunker(text, args.max_bytes))]
+        candidates += [(name, lambda name=name: chunk_text(text, args.max_bytes, name)) for name in segmenters]
+        for name, chunker in candidates:
+            median, chunks = time_chunker(chunker, args.repeat)
+            sizes = [len(chunk.encode("utf-8")) for chunk in chunks]
+            over = sum(1 for size in sizes if size > args.max_bytes)
+            empty = sum(1 for chunk in chunks if not chunk)
+            print(f"{label:<20} {name:<16} {median * 1000:>10.1f} {len(chunks):>7} {max(sizes, default=0):>10} {over:>5} {empty:>6}")
+            failed |= name != "legacy (punkt)" and bool(over or empty)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Checks the header-based durations in app.audio_processing against pydub's decoded durations.
+
+Usage:
+    python -m utils.check_audio_duration [CORPUS_DIR] [--tolerance SECONDS]
+
+Without CORPUS_DIR a small corpus (MP3 at several rates, LINEAR16 WAV, Ogg Opus and a
+frame-level concatenation) is generated with ffmpeg in a temporary directory.
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from pydub import AudioSegment
+from app.audio_processing import audio_duration, concatenate_mp3_chunks
+
+ENCODINGS = {".mp3": "MP3", ".wav": "LINEAR16", ".ogg": "OGG_OPUS", ".opus": "OGG_OPUS"}
+
+# (file name, ffmpeg output arguments, tone duration in seconds)
+GENERATED_CORPUS = [
+    ("tts_24k_mono_32k.mp3", ["-ar", "24000", "-ac", "1", "-b:a", "32k"], 2.3),
+    ("tts_24k_mono_64k_b.mp3", ["-ar", "24000", "-ac", "1", "-b:a", "64k"], 11.7),
+    ("music_44k_stereo_128k.mp3", ["-ar", "44100", "-ac", "2", "-b:a", "128k"], 7.05),
+    ("vbr_22k_mono.mp3", ["-ar", "22050", "-ac", "1", "-q:a", "5"], 4.4),
+    ("linear16_24k.wav", ["-ar", "24000", "-ac", "1", "-c:a", "pcm_s16le"], 3.21),
+    ("opus_24k.ogg", ["-ar", "24000", "-ac", "1", "-c:a", "libopus"], 5.5),
+]
+
+def generate_corpus(directory: Path) -> None:
+    for name, output_args, seconds in GENERATED_CORPUS:
+        subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+             *output_args, str(directory / name)],
+            check=True,
+        )
+    # Mirror the stream concatenation path used by text_to_speech.
+    chunks = [str(directory / "tts_24k_mono_32k.mp3"), str(directory / "tts_24k_mono_64k_b.mp3")]
+    with open(directory / "concatenated.mp3", "wb") as output:
+        concatenate_mp3_chunks(chunks, output)
+
+def check_corpus(directory: Path, tolerance: float) -> bool:
+    ok = True
+    print(f"{'file':<32} {'headers':>10} {'pydub':>10} {'diff':>8}")
+    for path in sorted(directory.iterdir()):
+        encoding = ENCODINGS.get(path.suffix.lower())
+        if not encoding:
+            continue
+        header_seconds = audio_duration(path.read_bytes(), encoding)
+        pydub_seconds = AudioSegment.from_file(path).duration_seconds
+        diff = abs(header_seconds - pydub_seconds)
+        ok = ok and diff <= tolerance
+        flag = "" if diff <= tolerance else "  <-- mismatch"
+        print(f"{path.name:<32} {header_seconds:>10.3f} {pydub_seconds:>10.3f} {diff:>8.3f}{flag}")
+    return ok
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", nargs="?", help="Directory of .mp3/.wav/.ogg files to check.")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Allowed difference in seconds.")
+    args = parser.parse_args()
+
+    if args.corpus_dir:
+        return 0 if check_corpus(Path(args.corpus_dir), args.tolerance) else 1
+    with tempfile.TemporaryDirectory() as directory:
+        generate_corpus(Path(directory))
+        return 0 if check_corpus(Path(directory), args.tolerance) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
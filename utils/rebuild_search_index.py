@@ -0,0 +1,21 @@
+"""Builds the local full-text search index from the articles in Firestore.
+
+Usage:
+    python -m utils.rebuild_search_index
+
+New articles are indexed as they are saved; run this once for articles saved before the
+index existed, or to repair an index that missed writes.
+"""
+import argparse
+import logging
+import sys
+from app.search_index import rebuild_from_firestore
+
+def main() -> int:
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    print(f"Indexed {rebuild_from_firestore()} articles.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Reports how long the web app's modules take to import on a cold interpreter.
+
+Usage:
+    python -m utils.startup_report [--module app.routes] [--top 20] [--runs 3] [--budget-ms 500]
+
+Runs `python -X importtime -c "import <module>"` in fresh subprocesses, then prints the
+median total import time and the modules with the largest cumulative import time from
+the fastest run. Heavy libraries that should only load on first use (see app/warmup.py)
+are flagged if they show up. With --budget-ms, exits 1 when the median total exceeds the
+budget, so the number can be tracked in CI.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Top-level packages that must not be imported while serving /health and /.
+LAZY_PACKAGES = ("newspaper", "trafilatura", "nltk", "pydub", "httpx", "bs4", "lxml")
+LAZY_MODULES = ("google.cloud.storage", "google.cloud.texttospeech")
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """Returns (module, self µs, cumulative µs, depth) for every import in a fresh interpreter."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+def total_ms(entries: List[Tuple[str, int, int, int]]) -> float:
+    return sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.routes")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(1, args.runs))]
+    totals = [total_ms(entries) for entries in runs]
+    fastest = runs[totals.index(min(totals))]
+    median = statistics.median(totals)
+
+    print(f"import {args.module}: median {median:.0f} ms over {len(runs)} runs (min {min(totals):.0f}, max {max(totals):.0f})")
+    print(f"\n{'cumulative ms':>14}  {'self ms':>8}  module")
+    cumulative_by_module: Dict[str, int] = {}
+    for name, self_us, cumulative_us, _ in fastest:
+        cumulative_by_module[name] = max(cumulative_by_module.get(name, 0), cumulative_us)
+    for name, cumulative_us in sorted(cumulative_by_module.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        self_us = next(self_us for module, self_us, _, _ in fastest if module == name)
+        print(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+    imported = {name for name, _, _, _ in fastest}
+    eager = [name for name in sorted(imported) if name in LAZY_PACKAGES or name in LAZY_MODULES]
+    if eager:
+        print(f"\nImported at startup but expected to load lazily: {', '.join(eager)}")
+
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"\nOver budget: {median:.0f} ms > {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
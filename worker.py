@@ -0,0 +1,80 @@
+# worker.py
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+from config import Config
+from app.job_queue import get_job_queue
+from app.services import process_article, sweep_downloads
+from app.warmup import preload_heavy_modules
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+_stop_requested = False
+
+def _request_stop(signum, frame):
+    global _stop_requested
+    logging.info(f"Received signal {signum}; stopping after the current job.")
+    _stop_requested = True
+
+def handle_process_article(job: dict, queue) -> dict:
+    payload = job["payload"]
+    download_link = process_article(
+        payload["url"],
+        hashtags=payload.get("hashtags") or [],
+        voice_name=payload.get("voice_name"),
+        progress_callback=lambda stage, progress: queue.update_progress(job["id"], stage, progress),
+    )
+    return {"audio_url": download_link}
+
+# Handlers by job type
+JOB_HANDLERS = {
+    "process_article": handle_process_article,
+}
+
+def run_job(job: dict, queue) -> None:
+    handler = JOB_HANDLERS.get(job["job_type"])
+    if handler is None:
+        queue.fail(job["id"], f"Unknown job type: {job['job_type']}", retry=False)
+        return
+    logging.info(f"Running {job['job_type']} job {job['id']} (attempt {job['attempts']})")
+    try:
+        queue.complete(job["id"], handler(job, queue))
+        logging.info(f"Job {job['id']} succeeded.")
+    except ValueError as e:
+        # Invalid URLs and articles without text will not get better on retry.
+        queue.fail(job["id"], str(e), retry=False)
+    except Exception as e:
+        logging.error(f"Job {job['id']} failed: {e}", exc_info=True)
+        queue.fail(job["id"], str(e), retry=True)
+
+def run_worker(poll_interval: float = Config.WORKER_POLL_INTERVAL, once: bool = False) -> None:
+    """Drains the job queue until stopped, or until it is empty when `once` is set."""
+    queue = get_job_queue()
+    # Every job needs the extraction and TTS libraries, so load them before claiming one.
+    preload_heavy_modules()
+    sweep_downloads()
+    logging.info(f"Worker {WORKER_ID} started with backend '{Config.JOB_QUEUE_BACKEND}'.")
+    while not _stop_requested:
+        job = queue.claim(WORKER_ID)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job, queue)
+    logging.info(f"Worker {WORKER_ID} stopped.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Processes queued article jobs.")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+    parser.add_argument("--poll-interval", type=float, default=Config.WORKER_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+    run_worker(poll_interval=args.poll_interval, once=args.once)